@@ -16,6 +16,8 @@ import EmptyState from '../components/EmptyState'
 import { useToast } from '../components/Toast'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
+// Archived closed cases shown below the active ones; older ones are paged on the server
+const ARCHIVED_PAGE_SIZE = 50
 
 const PROVIDERS = [
   { id: 'dr-chen', name: 'Dr. Sarah Chen', status: 'GOLD_CARD', approval_rate: 98 },
@@ -86,8 +88,12 @@ const Dashboard = () => {
 
   const fetchPatients = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/patients`)
-      setPatients(response.data)
+      // Active cases, plus the most recently archived closed ones
+      const [active, archived] = await Promise.all([
+        axios.get(`${API_URL}/api/patients`),
+        axios.get(`${API_URL}/api/patients/archived`, { params: { limit: ARCHIVED_PAGE_SIZE } }),
+      ])
+      setPatients([...active.data, ...archived.data.results])
     } catch (error) {
       console.error('Failed to load patients:', error)
       toast.error('Failed to load cases. Please refresh the page.')
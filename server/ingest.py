@@ -0,0 +1,181 @@
+"""Bulk-ingest referral PDFs as patient cases.
+
+Usage (from the server directory):
+
+    python ingest.py path/to/pdfs --policy-id medicare_cms_knee_mri_2025
+    python ingest.py --manifest backlog.csv --workers 16
+
+A manifest is a CSV with the columns ``file, policy_id, provider_id, sla_hours``;
+relative file paths are resolved against the manifest's directory and blank
+columns fall back to the command-line defaults.
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services import (  # noqa: E402
+    blob_service,
+    name_service,
+    patient_service,
+    policy_service,
+    preprocess_service,
+)
+
+logger = logging.getLogger("prism.ingest")
+
+
+def _load_manifest(manifest: Path, args: argparse.Namespace) -> Tuple[List[Dict], int]:
+    """Read ingest items from a CSV manifest; returns the items and the number of bad rows skipped."""
+    items = []
+    skipped = 0
+    with open(manifest, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            file_value = (row.get("file") or "").strip()
+            if not file_value:
+                continue
+            sla_value = (row.get("sla_hours") or "").strip()
+            try:
+                sla_hours = int(sla_value) if sla_value else args.sla_hours
+                if sla_hours <= 0:
+                    raise ValueError
+            except ValueError:
+                logger.error(f"Skipping {file_value} (line {reader.line_num}): invalid sla_hours {sla_value!r}")
+                skipped += 1
+                continue
+            items.append({
+                "file": manifest.parent / file_value,
+                "policy_id": (row.get("policy_id") or "").strip() or args.policy_id,
+                "provider_id": (row.get("provider_id") or "").strip() or args.provider_id,
+                "sla_hours": sla_hours,
+            })
+    return items, skipped
+
+
+def _load_directory(directory: Path, args: argparse.Namespace) -> List[Dict]:
+    """Build ingest items for every PDF in a directory."""
+    return [
+        {
+            "file": path,
+            "policy_id": args.policy_id,
+            "provider_id": args.provider_id,
+            "sla_hours": args.sla_hours,
+        }
+        for path in sorted(directory.iterdir(), key=lambda p: p.name.lower())
+        # Scanners often write upper-case extensions (SCAN.PDF)
+        if path.is_file() and path.suffix.lower() == ".pdf"
+    ]
+
+
+async def _prepare_item(
+    item: Dict,
+    policies: Dict[str, Dict],
+    semaphore: asyncio.Semaphore,
+    detect_names: bool,
+) -> Optional[Dict]:
+    """Read, name and store one document; return case fields or None on failure."""
+    path: Path = item["file"]
+    policy = policies.get(item["policy_id"])
+    if not policy:
+        logger.error(f"Skipping {path}: policy '{item['policy_id']}' not found")
+        return None
+
+    async with semaphore:
+        try:
+            content = await asyncio.to_thread(path.read_bytes)
+        except OSError as exc:
+            logger.error(f"Skipping {path}: {exc}")
+            return None
+        if not content:
+            logger.error(f"Skipping {path}: file is empty")
+            return None
+
+        # Hashing and the fsync'd write run in a thread; the blob index lock is thread-safe
+        blob = await asyncio.to_thread(blob_service.put_blob, content, path.name)
+
+        patient_name = None
+        if detect_names:
+            try:
+                # Preprocessed once and cached for the later analysis of this blob
+                ocr_content = await preprocess_service.prepare_for_ocr(content, blob["hash"])
+                patient_name = (await name_service.detect_patient_name(ocr_content)).name
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"Name detection failed for {path.name}: {exc}")
+
+    return {
+        "patient_name": patient_name or name_service.name_from_filename(path.name),
+        "policy_id": policy["id"],
+        "policy_name": policy.get("name", ""),
+        "file_path": blob["path"],
+        "provider_id": item["provider_id"],
+        "sla_hours": item["sla_hours"],
+        "file_hash": blob["hash"],
+    }
+
+
+async def ingest(items: List[Dict], workers: int, detect_names: bool = True) -> List[Dict]:
+    """Process items with a bounded worker pool and commit all cases in one write."""
+    policies = {policy.get("id"): policy for policy in policy_service.get_all_policies()}
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    prepared = await asyncio.gather(
+        *(_prepare_item(item, policies, semaphore, detect_names) for item in items)
+    )
+    return patient_service.create_patient_cases([case for case in prepared if case])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-ingest referral PDFs as patient cases.")
+    parser.add_argument("directory", nargs="?", type=Path, help="Directory of PDFs to ingest")
+    parser.add_argument("--manifest", type=Path, help="CSV of file, policy_id, provider_id, sla_hours")
+    parser.add_argument("--policy-id", help="Policy for files without one in the manifest")
+    parser.add_argument("--provider-id", default=None, help="Default provider ID")
+    parser.add_argument("--sla-hours", type=int, default=72, help="Default SLA in hours")
+    parser.add_argument("--workers", type=int, default=8, help="Maximum documents processed at once")
+    parser.add_argument(
+        "--skip-name-detection",
+        action="store_true",
+        help="Name cases from file names instead of OCR'ing the first page",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    if bool(args.directory) == bool(args.manifest):
+        parser.error("provide either a directory or --manifest")
+    if args.directory:
+        if not args.policy_id:
+            parser.error("--policy-id is required when ingesting a directory")
+        items, skipped = _load_directory(args.directory, args), 0
+    else:
+        items, skipped = _load_manifest(args.manifest, args)
+
+    if not items:
+        logger.warning("Nothing to ingest")
+        return 1 if skipped else 0
+
+    started = time.perf_counter()
+    try:
+        cases = asyncio.run(ingest(items, args.workers, detect_names=not args.skip_name_detection))
+    finally:
+        preprocess_service.shutdown()
+    elapsed = time.perf_counter() - started
+
+    rate = len(cases) / elapsed if elapsed > 0 else float(len(cases))
+    if cases:
+        logger.info(f"Created {cases[0]['id']}..{cases[-1]['id']}")
+    logger.info(f"Ingested {len(cases)}/{len(items)} documents in {elapsed:.2f}s ({rate:.1f} docs/sec)")
+    return 0 if len(cases) == len(items) and not skipped else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
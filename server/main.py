@@ -1,17 +1,112 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from routes import analyze, policies, patients
 
+# Load .env once, before any service reads its settings
 load_dotenv()
 
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from routes import analyze, policies, patients, providers, search
+from services import (
+    blob_service,
+    entity_service,
+    llm_service,
+    ocr_service,
+    patient_service,
+    policy_service,
+    preprocess_service,
+    profile_service,
+    provider_service,
+    search_service,
+    store_service,
+)
+from services.blob_service import UploadStaticFiles
+
+logger = logging.getLogger("prism.main")
+
+# How often closed cases are moved from patients.json to the archive,
+# provider statistics are checked against the case stores and unreferenced
+# upload blobs are deleted
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("PRISM_ARCHIVE_INTERVAL_HOURS", "6")) * 3600
+
+
+def _warm_up() -> dict:
+    """Load registries and create pooled SDK clients so the first request doesn't pay for it."""
+    return {
+        "policies": policy_service.warm_up(),
+        "providers": len(provider_service.get_all_providers()),
+        "search_index": search_service.warm_up(),
+        "document_intelligence_client": ocr_service.warm_up(),
+        "language_client": entity_service.warm_up(),
+        "github_models_client": llm_service.warm_up(),
+    }
+
+
+async def _maintain_periodically() -> None:
+    """Build the search index if needed, archive old closed cases, check provider
+    statistics and collect unreferenced blobs, at startup and then periodically.
+
+    Only one worker process does this: whichever holds the maintenance lock.
+    The others keep trying each interval and take over if the holder exits.
+    """
+    while True:
+        if not store_service.hold_leadership("maintenance"):
+            await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+            continue
+        try:
+            indexed = await asyncio.to_thread(search_service.build_index)
+            if indexed:
+                logger.info(f"Built the search index over {indexed} existing cases")
+        except Exception:  # noqa: BLE001
+            logger.exception("Building the search index failed")
+        try:
+            archived = await asyncio.to_thread(patient_service.archive_closed_cases)
+            if archived:
+                logger.info(f"Archived {archived} closed cases")
+        except Exception:  # noqa: BLE001
+            logger.exception("Archiving closed cases failed")
+        try:
+            if await asyncio.to_thread(provider_service.reconcile_stats):
+                logger.warning("Provider statistics had drifted from the case stores and were rebuilt")
+        except Exception:  # noqa: BLE001
+            logger.exception("Reconciling provider statistics failed")
+        try:
+            removed = await asyncio.to_thread(blob_service.collect_garbage)
+            if removed:
+                logger.info(f"Deleted {len(removed)} unreferenced upload blobs")
+        except Exception:  # noqa: BLE001
+            logger.exception("Collecting unreferenced blobs failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_started = time.perf_counter()
+    app.state.warm_up = await asyncio.to_thread(_warm_up)
+    now = time.perf_counter()
+    app.state.startup_seconds = round(now - _import_started, 3)
+    logger.info(
+        f"Startup complete in {app.state.startup_seconds:.3f}s "
+        f"(warm-up {now - warm_started:.3f}s): {app.state.warm_up}"
+    )
+    maintenance_task = asyncio.create_task(_maintain_periodically())
+    yield
+    maintenance_task.cancel()
+    preprocess_service.shutdown()
+
+
 # --- FastAPI setup ---------------------------------------------------------
 
-app = FastAPI(title="Prism API")
+app = FastAPI(title="Prism API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,14 +116,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints that can be profiled per request (see services/profile_service.py)
+PROFILED_PATHS = {"/api/analyze", "/api/upload"}
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    if request.url.path not in PROFILED_PATHS or not profile_service.should_profile(request.headers):
+        return await call_next(request)
+
+    async with profile_service.RequestProfiler(request.method, request.url.path) as profiler:
+        response = await call_next(request)
+    response.headers[profile_service.PROFILE_ID_HEADER] = profiler.id
+    return response
+
+
 app.include_router(analyze.router)
 app.include_router(policies.router)
 app.include_router(patients.router)
+app.include_router(providers.router)
+app.include_router(search.router)
 
-# Mount uploads directory as static files
+# Mount uploads directory (legacy files + content-addressed blobs) with
+# Range and ETag support
 uploads_dir = Path(__file__).parent / "uploads"
 uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=str(uploads_dir)), name="uploads")
 
 
 @app.get("/")
@@ -45,10 +158,34 @@ def health_check():
         and bool(os.getenv("AZURE_DOC_INTEL_KEY")),
         "language_configured": bool(os.getenv("AZURE_LANGUAGE_ENDPOINT"))
         and bool(os.getenv("AZURE_LANGUAGE_KEY")),
+        "startup_seconds": getattr(app.state, "startup_seconds", None),
+        "warm_up": getattr(app.state, "warm_up", None),
     }
 
 
 if __name__ == "__main__":
+    import argparse
+
     import uvicorn
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Run the Prism API server.")
+    parser.add_argument("--prod", action="store_true", help="Multi-worker mode without auto-reload")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        help=(
+            "Worker processes in --prod mode (default: WEB_CONCURRENCY or CPU count); "
+            "analyze and profiling limits are split between them"
+        ),
+    )
+    args = parser.parse_args()
+
+    if args.prod:
+        # Workers inherit this and divide the deployment-wide limits by it
+        os.environ["PRISM_WORKERS"] = str(args.workers)
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, log_level="info")
+    else:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
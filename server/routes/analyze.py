@@ -1,15 +1,59 @@
+import asyncio
 import logging
 from pathlib import Path
+from typing import Optional
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
 from models import AnalysisResult
-from services import entity_service, llm_service, ocr_service, policy_service, patient_service
+from services import (
+    admission_service,
+    entity_service,
+    llm_service,
+    ocr_service,
+    patient_service,
+    policy_service,
+    preprocess_service,
+    profile_service,
+)
 
 router = APIRouter(prefix="/api", tags=["analyze"])
 logger = logging.getLogger("prism.analyze")
 
 
+async def _run_pipeline(policy_text: str, file_bytes: bytes, content_hash: Optional[str] = None):
+    """OCR, entity extraction and policy decision for one document.
+
+    ``content_hash`` identifies a stored blob, whose OCR-ready copy is reused.
+    """
+    with profile_service.span("preprocess"):
+        file_bytes = await preprocess_service.prepare_for_ocr(file_bytes, content_hash)
+
+    logger.info("Extracting...")
+    try:
+        with profile_service.span("ocr"):
+            ocr_text = await ocr_service.extract_text_from_pdf(file_bytes)
+    except Exception as exc:
+        logger.exception("OCR extraction failed")
+        raise HTTPException(status_code=400, detail="Failed to read document") from exc
+
+    logger.info("Found Entities...")
+    with profile_service.span("entities"):
+        entities_result = await entity_service.extract_medical_entities(ocr_text)
+    entities = entities_result.get("entities", []) if isinstance(entities_result, dict) else []
+
+    logger.info("Decision Made...")
+    with profile_service.span("llm_decision"):
+        decision = await llm_service.evaluate_medical_policy(policy_text, ocr_text, entities)
+    return ocr_text, entities, decision
+
+
+@router.get("/analyze/metrics")
+async def analyze_metrics():
+    """Admission queue depth, in-flight count and wait-time statistics."""
+    return admission_service.analyze_admission.metrics()
+
+
 @router.post("/analyze", response_model=AnalysisResult)
 async def analyze_document(
     file: UploadFile = File(None),
@@ -18,13 +62,15 @@ async def analyze_document(
 ):
     # Step 0: Fetch policy text
     try:
-        policy_text = policy_service.get_policy_text(policy_id)
+        with profile_service.span("policy_lookup"):
+            policy_text = policy_service.get_policy_text(policy_id)
     except ValueError as exc:
         logger.exception("Invalid policy ID")
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     # Step 1: Read file (either from upload or disk)
     file_bytes = None
+    patient = None
     
     if file:
         # File uploaded directly (QuickAnalysis flow)
@@ -39,7 +85,8 @@ async def analyze_document(
     elif patient_id:
         # Read from disk (Dashboard flow)
         try:
-            patient = patient_service.get_patient_by_id(patient_id)
+            with profile_service.span("patient_lookup"):
+                patient = patient_service.get_patient_by_id(patient_id)
             if not patient:
                 raise HTTPException(status_code=404, detail=f"Patient case '{patient_id}' not found")
             
@@ -48,7 +95,7 @@ async def analyze_document(
             if not file_path.exists():
                 raise HTTPException(status_code=404, detail="Patient file not found on server")
             
-            with file_path.open("rb") as f:
+            with profile_service.span("read_file"), file_path.open("rb") as f:
                 file_bytes = f.read()
             
             print(f"DEBUG ANALYZE (Disk): Read {len(file_bytes)} bytes from {file_path.name}")
@@ -65,39 +112,50 @@ async def analyze_document(
     if len(file_bytes) == 0:
         raise HTTPException(status_code=400, detail="Saved file is empty on disk!")
 
-    logger.info("Extracting...")
+    # Step 2: Wait for an analysis slot; the most urgent SLA deadline goes first
+    kind = admission_service.KIND_CASE if patient else admission_service.KIND_QUICK
     try:
-        ocr_text = await ocr_service.extract_text_from_pdf(file_bytes)
-    except Exception as exc:
-        logger.exception("OCR extraction failed")
-        raise HTTPException(status_code=400, detail="Failed to read document") from exc
-
-    logger.info("Found Entities...")
-    entities_result = await entity_service.extract_medical_entities(ocr_text)
-    entities = entities_result.get("entities", []) if isinstance(entities_result, dict) else []
+        with profile_service.span("admission_and_pipeline"):
+            async with admission_service.analyze_admission.slot(
+                admission_service.sla_deadline(patient), kind
+            ):
+                ocr_text, entities, decision = await _run_pipeline(
+                    policy_text, file_bytes, patient.get("file_hash") if patient else None
+                )
+    except admission_service.AdmissionRejected as exc:
+        logger.warning(f"Analyze request rejected: {exc}")
+        # A full queue means this client should back off; a timeout means we're overloaded
+        status_code = 429 if exc.reason == admission_service.REASON_QUEUE_FULL else 503
+        raise HTTPException(
+            status_code=status_code,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
 
-    logger.info("Decision Made...")
-    decision = await llm_service.evaluate_medical_policy(policy_text, ocr_text, entities)
-
-    result = AnalysisResult(
-        status=decision.status,
-        reasoning=decision.reason,
-        summary=decision.summary,
-        entities_detected=entities,
-        fhir_json={"entities": entities},
-        rfi_draft=decision.rfi_draft,
-        evidence_quote=decision.evidence_quote,
-        criteria_met=decision.criteria_met,
-        missing_criteria=decision.missing_criteria,
-        documentation_complete=decision.documentation_complete,
-        missing_documentation=decision.missing_documentation,
-        policy_match=decision.policy_match,
-    )
+    with profile_service.span("build_result"):
+        result = AnalysisResult(
+            status=decision.status,
+            reasoning=decision.reason,
+            summary=decision.summary,
+            entities_detected=entities,
+            fhir_json={"entities": entities},
+            rfi_draft=decision.rfi_draft,
+            evidence_quote=decision.evidence_quote,
+            criteria_met=decision.criteria_met,
+            missing_criteria=decision.missing_criteria,
+            documentation_complete=decision.documentation_complete,
+            missing_documentation=decision.missing_documentation,
+            policy_match=decision.policy_match,
+        )
 
     # Update patient case if patient_id provided
     if patient_id:
         try:
-            patient_service.update_patient_analysis(patient_id, result.dict())
+            with profile_service.span("store_update"):
+                # Store writes take a blocking cross-process lock; keep them off the event loop
+                await asyncio.to_thread(
+                    patient_service.update_patient_analysis, patient_id, result.dict(), ocr_text
+                )
             logger.info(f"Updated patient case {patient_id} with analysis results")
         except ValueError as exc:
             logger.warning(f"Failed to update patient case: {exc}")
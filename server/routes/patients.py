@@ -1,93 +1,76 @@
+import asyncio
 import logging
-import re
 import shutil
-from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, Query, UploadFile
 
-from services import ocr_service, patient_service, policy_service
+from services import (
+    admission_service,
+    blob_service,
+    name_service,
+    ocr_service,
+    patient_service,
+    policy_service,
+    preprocess_service,
+)
 
 router = APIRouter(prefix="/api", tags=["patients"])
 logger = logging.getLogger("prism.patients")
 
-UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
 
+async def _detect_patient_name_full(
+    case_id: str,
+    content: bytes,
+    detection: name_service.NameDetection,
+) -> None:
+    """Background task: OCR the rest of the document and fill in a better patient name.
 
-def _guess_patient_name_from_text(text: str) -> Optional[str]:
-    """Heuristically pull a patient name from OCR'd text and strip labels.
-
-    Handles patterns like:
-    - "Patient Name: Jane Doe"
-    - "Name - John Smith"
-    - "Name: Tharun" → "Tharun"
-    - Single-word names
+    ``content`` is the document as prepared for OCR; pages the fast path
+    already read are not OCR'd again. The OCR call waits for an analysis slot
+    like any other, so uploads can't flood the OCR service.
     """
-    if not text:
-        return None
-
-    def _clean_candidate(s: str) -> str:
-        s = s.strip()
-        # Strip common label prefixes with optional punctuation
-        s = re.sub(r"^(patient\s*name|member\s*name|patient|name)\s*[:\-–—]*\s*",
-                   "", s, flags=re.IGNORECASE)
-        s = s.strip(" -:|\t")
-        # Remove non-name characters (keep letters, spaces, apostrophes, hyphens, dots)
-        s = re.sub(r"[^A-Za-z\s\.'-]", "", s).strip()
-        # Trim to at most 4 words
-        parts = [p for p in s.split() if p]
-        if parts and parts[0].lower() in {"name", "patient", "member"}:
-            parts = parts[1:]
-        parts = parts[:4]
-        return " ".join(parts)
-
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    candidates = []
-
-    # Look for common prefixes
-    prefixes = ["patient name", "member name", "name", "patient"]
-    for line in lines[:120]:  # limit scan for performance
-        lower_line = line.lower()
-        if any(prefix in lower_line for prefix in prefixes):
-            # Split on common separators if present, else take full line
-            parts = re.split(r"[:\-–—]", line, maxsplit=1)
-            candidate = parts[1] if len(parts) > 1 else line
-            cleaned = _clean_candidate(candidate)
-            if 1 <= len(cleaned.split()) <= 4:
-                candidates.append(cleaned)
-
-    # Fallback: first reasonably short line that looks like a name (1-4 words)
-    if not candidates:
-        for line in lines[:80]:
-            cleaned = _clean_candidate(line)
-            if 1 <= len(cleaned.split()) <= 4 and cleaned:
-                candidates.append(cleaned)
-
-    if candidates:
-        # Prefer shortest plausible candidate to avoid long sentences
-        best = sorted(candidates, key=len)[0]
-        return best.title()
-    return None
-
-
-def _slugify_name_for_file(name: str) -> str:
-    safe = re.sub(r"[^a-zA-Z0-9]+", "_", name.strip().lower())
-    safe = re.sub(r"_+", "_", safe).strip("_")
-    return safe or "patient"
+    try:
+        pages = name_service.remaining_pages(content, detection.pages_read)
+        if pages == "":
+            return
+        async with admission_service.analyze_admission.slot(
+            admission_service.sla_deadline(None), admission_service.KIND_QUICK
+        ):
+            rest = await ocr_service.extract_text_from_pdf(content, pages=pages)
+        ocr_text = f"{detection.text}\n{rest}" if pages else rest
+        name = name_service.guess_patient_name_from_text(ocr_text, labelled_only=True)
+        if name:
+            await asyncio.to_thread(patient_service.update_patient_name, case_id, name)
+            logger.info(f"Updated patient name for case {case_id} from full document")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(f"Full-document name detection failed for case {case_id}: {exc}")
 
 
 @router.get("/patients")
-async def list_patients():
-    """Get all patient cases."""
+async def list_patients(include_archived: bool = False):
+    """Get active patient cases; all archived summaries too on request (see /patients/archived)."""
     try:
-        patients = patient_service.get_all_patients()
+        patients = patient_service.list_patients(include_archived=include_archived)
         return patients
     except Exception as exc:
         logger.exception("Failed to list patients")
         raise HTTPException(status_code=500, detail="Failed to retrieve patients") from exc
 
 
+@router.get("/patients/archived")
+async def list_archived_patients(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Page through archived closed cases, most recently archived first."""
+    try:
+        return patient_service.list_archived_patients(offset=offset, limit=limit)
+    except Exception as exc:
+        logger.exception("Failed to list archived patients")
+        raise HTTPException(status_code=500, detail="Failed to retrieve archived patients") from exc
+
+
 @router.get("/patients/{patient_id}")
 async def get_patient(patient_id: str):
     """Get a specific patient case by ID."""
@@ -111,7 +94,8 @@ async def send_rfi(patient_id: str, message: str = Form("")):
         if not patient:
             raise HTTPException(status_code=404, detail=f"Patient case '{patient_id}' not found")
         
-        updated = patient_service.mark_rfi_sent(patient_id, message)
+        # Store writes take a blocking cross-process lock; keep them off the event loop
+        updated = await asyncio.to_thread(patient_service.mark_rfi_sent, patient_id, message)
         logger.info(f"RFI sent for case {patient_id}")
         return {"success": True, "patient": updated}
     except HTTPException:
@@ -123,6 +107,7 @@ async def send_rfi(patient_id: str, message: str = Form("")):
 
 @router.post("/upload")
 async def upload_case(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     patient_name: Optional[str] = Form(None),
     policy_id: str = Form(...),
@@ -148,36 +133,48 @@ async def upload_case(
         if len(content) == 0:
             raise HTTPException(status_code=400, detail="File is empty!")
         
-        # Extract patient name from document if not provided
+        # Store file in the content-addressed blob store (deduplicated). If the
+        # case below can't be created the blob stays unreferenced and is
+        # removed by blob_service.collect_garbage.
+        blob = await asyncio.to_thread(blob_service.put_blob, content, file.filename)
+        if blob["deduplicated"]:
+            logger.info(f"Reusing stored blob {blob['hash']} for {file.filename}")
+
+        # Extract patient name from the first page(s) if not provided
         resolved_patient_name = (patient_name or "").strip()
+        name_detected = bool(resolved_patient_name)
+        ocr_content = content
+        detection = name_service.NameDetection(None, "", 0)
         if not resolved_patient_name:
             try:
-                ocr_text = await ocr_service.extract_text_from_pdf(content)
-                resolved_patient_name = _guess_patient_name_from_text(ocr_text) or ""
+                # Preprocessed once here and cached for every later OCR of this blob
+                ocr_content = await preprocess_service.prepare_for_ocr(content, blob["hash"])
+                detection = await name_service.detect_patient_name(ocr_content)
+                resolved_patient_name = detection.name or ""
+                name_detected = bool(resolved_patient_name)
             except Exception as exc:  # noqa: BLE001
                 logger.warning(f"Failed to auto-extract patient name: {exc}")
 
         # Final fallback: derive from file name or default
         if not resolved_patient_name:
-            stem = Path(file.filename).stem.replace("_", " ").strip()
-            resolved_patient_name = stem.title() if stem else "Unknown Patient"
-
-        # Save file to uploads directory with safe prefix
-        file_prefix = _slugify_name_for_file(resolved_patient_name)
-        file_path = UPLOAD_DIR / f"{file_prefix}_{file.filename}"
-        with file_path.open("wb") as buffer:
-            buffer.write(content)
+            resolved_patient_name = name_service.name_from_filename(file.filename)
 
         # Create patient case entry (with optional provider_id for fast lane)
-        case = patient_service.create_patient_case(
+        case = await asyncio.to_thread(
+            patient_service.create_patient_case,
             patient_name=resolved_patient_name,
             policy_id=policy_id,
             policy_name=policy.get("name", ""),
-            file_path=str(file_path.relative_to(Path(__file__).parent.parent)),
+            file_path=blob["path"],
             provider_id=provider_id,
             sla_hours=sla_hours,
+            file_hash=blob["hash"],
         )
         
+        # No labelled name on the first pages: return now, scan the remaining pages later
+        if not name_detected:
+            background_tasks.add_task(_detect_patient_name_full, case["id"], ocr_content, detection)
+
         logger.info(f"Created new case {case['id']} for {resolved_patient_name}")
         return case
     
@@ -0,0 +1,42 @@
+import logging
+
+from fastapi import APIRouter, HTTPException
+
+from services import provider_service
+
+router = APIRouter(prefix="/api", tags=["providers"])
+logger = logging.getLogger("prism.providers")
+
+
+def _with_stats(provider: dict) -> dict:
+    provider_id = provider.get("id")
+    return {
+        **provider,
+        "stats": provider_service.get_provider_stats(provider_id),
+        "gold_card": provider_service.get_gold_card_status(provider_id),
+    }
+
+
+@router.get("/providers")
+async def list_providers():
+    """Get all providers with their case statistics."""
+    try:
+        return [_with_stats(p) for p in provider_service.get_all_providers()]
+    except Exception as exc:
+        logger.exception("Failed to list providers")
+        raise HTTPException(status_code=500, detail="Failed to retrieve providers") from exc
+
+
+@router.get("/providers/{provider_id}")
+async def get_provider(provider_id: str):
+    """Get a specific provider with case statistics and gold card eligibility."""
+    try:
+        provider = provider_service.get_provider_by_id(provider_id)
+        if not provider:
+            raise HTTPException(status_code=404, detail=f"Provider '{provider_id}' not found")
+        return _with_stats(provider)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception(f"Failed to retrieve provider {provider_id}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve provider") from exc
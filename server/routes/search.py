@@ -0,0 +1,22 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services import search_service
+
+router = APIRouter(prefix="/api", tags=["search"])
+logger = logging.getLogger("prism.search")
+
+
+@router.get("/search")
+async def search_cases(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Full-text search over cases, OCR text and detected entities."""
+    try:
+        return search_service.search(q, limit=limit, offset=offset)
+    except Exception as exc:
+        logger.exception(f"Search failed for query {q!r}")
+        raise HTTPException(status_code=500, detail="Search failed") from exc
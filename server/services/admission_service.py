@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+# Request kinds, in priority order when SLA deadlines tie.
+KIND_CASE = "case"
+KIND_QUICK = "quick"
+_KIND_RANK = {KIND_CASE: 0, KIND_QUICK: 1}
+
+# Quick analyses have no case SLA; they are scheduled as if due this far out.
+QUICK_ANALYSIS_SLA_HOURS = 72
+
+# Server worker processes (set by `main.py --prod`). Each one runs its own
+# controller, so the deployment-wide limits below are split between them.
+WORKER_PROCESSES = max(1, int(os.getenv("PRISM_WORKERS", "1")))
+
+
+def per_worker(limit: int) -> int:
+    """This process's share of a deployment-wide limit (at least 1)."""
+    return max(1, limit // WORKER_PROCESSES)
+
+
+# Why a request was rejected
+REASON_QUEUE_FULL = "queue_full"
+REASON_WAIT_TIMEOUT = "wait_timeout"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def sla_deadline(patient: Optional[Dict]) -> datetime:
+    """Deadline for a case: received_date + sla_hours, or a default for ad-hoc requests."""
+    now = datetime.now(timezone.utc)
+    if not patient:
+        return now + timedelta(hours=QUICK_ANALYSIS_SLA_HOURS)
+    try:
+        received = datetime.fromisoformat(patient.get("received_date"))
+    except (TypeError, ValueError):
+        received = now
+    if received.tzinfo is None:
+        received = received.replace(tzinfo=timezone.utc)
+    return received + timedelta(hours=patient.get("sla_hours") or QUICK_ANALYSIS_SLA_HOURS)
+
+
+class AdmissionController:
+    """Bounded in-flight limit with an SLA-ordered waiting queue.
+
+    Up to ``max_in_flight`` requests run at once. Later arrivals wait in a
+    priority queue ordered by (deadline, kind, arrival). Arrivals beyond
+    ``max_queue`` waiters, and waiters queued longer than ``max_wait_seconds``,
+    are rejected with ``AdmissionRejected``.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, max_wait_seconds: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._in_flight = 0
+        self._queue: List[list] = []
+        self._counter = itertools.count()
+        self._admitted = 0
+        self._rejected = 0
+        self._wait_times: deque = deque(maxlen=500)
+        self._service_times: deque = deque(maxlen=100)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for entry in self._queue if not entry[-1].done())
+
+    def _retry_after(self) -> int:
+        """Rough seconds until a slot frees up for a new arrival."""
+        avg_service = (
+            sum(self._service_times) / len(self._service_times) if self._service_times else 5.0
+        )
+        waves = (self.queue_depth + 1) / self.max_in_flight
+        return max(1, math.ceil(avg_service * waves))
+
+    def _reject(self, message: str, reason: str) -> AdmissionRejected:
+        self._rejected += 1
+        return AdmissionRejected(message, self._retry_after(), reason)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the most urgent live waiter
+        while self._queue:
+            *_, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, deadline: datetime, kind: str = KIND_CASE):
+        """Hold one in-flight slot for the duration of the block."""
+        enqueued = time.monotonic()
+
+        if self._in_flight < self.max_in_flight and not self.queue_depth:
+            self._in_flight += 1
+        elif self.queue_depth >= self.max_queue:
+            raise self._reject("Analysis queue is full", REASON_QUEUE_FULL)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            entry = [deadline.timestamp(), _KIND_RANK.get(kind, len(_KIND_RANK)), next(self._counter), waiter]
+            heapq.heappush(self._queue, entry)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait_seconds)
+            except asyncio.TimeoutError:
+                if waiter.done():
+                    # Granted at the last moment; give the slot back
+                    self._release()
+                else:
+                    waiter.cancel()
+                raise self._reject("Timed out waiting for an analysis slot", REASON_WAIT_TIMEOUT)
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                else:
+                    waiter.cancel()
+                raise
+
+        started = time.monotonic()
+        self._wait_times.append(started - enqueued)
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - started)
+            self._release()
+
+    def metrics(self) -> Dict:
+        """Snapshot of queue depth, in-flight count and wait-time statistics."""
+        waits = sorted(self._wait_times)
+
+        def _percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "wait_ms_p50": _percentile(0.5),
+            "wait_ms_p95": _percentile(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else None,
+        }
+
+
+# PRISM_ANALYZE_MAX_IN_FLIGHT / _MAX_QUEUE are per deployment; with more
+# workers than in-flight slots every worker still gets one
+analyze_admission = AdmissionController(
+    max_in_flight=per_worker(int(os.getenv("PRISM_ANALYZE_MAX_IN_FLIGHT", "4"))),
+    max_queue=per_worker(int(os.getenv("PRISM_ANALYZE_MAX_QUEUE", "32"))),
+    max_wait_seconds=float(os.getenv("PRISM_ANALYZE_MAX_WAIT_SECONDS", "60")),
+)
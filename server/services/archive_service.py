@@ -0,0 +1,240 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services import store_service
+
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "archive"
+# Append-only log mapping case IDs to their gzip member:
+# {"id", "at": [segment, offset, length]}, or {"id", "removed": true} once the
+# case moves back to the hot store. Replayed incrementally on read.
+ARCHIVE_INDEX_FILE = ARCHIVE_DIR / "index.jsonl"
+# Append-only case summaries, so archived cases can be listed without
+# decompressing segments; the latest line per case wins
+ARCHIVE_LISTING_FILE = ARCHIVE_DIR / "listing.jsonl"
+
+# Closed statuses eligible for archiving, and how long after the decision
+CLOSED_STATUSES = ("APPROVED", "DENIED", "AUTO_APPROVED")
+ARCHIVE_AFTER_DAYS = float(os.getenv("PRISM_ARCHIVE_AFTER_DAYS", "30"))
+# Segments are append-only; a new one is started once the current one is this big
+SEGMENT_MAX_BYTES = int(os.getenv("PRISM_ARCHIVE_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Fields kept in the listing file
+SUMMARY_FIELDS = (
+    "id",
+    "patient_name",
+    "policy_id",
+    "policy_name",
+    "provider_id",
+    "provider_name",
+    "status",
+    "received_date",
+    "decided_at",
+    "sla_hours",
+    "sla_remaining_hours",
+    "rfi_sent",
+)
+
+
+class _Log:
+    """In-memory replay of an append-only JSONL file, extended as the file grows."""
+
+    def __init__(self, path: Path, apply):
+        self.path = path
+        self._apply = apply
+        self._read_to = 0
+
+    def refresh(self) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._read_to:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._read_to)
+            data = f.read()
+        # Only whole lines; a torn final line from a crash is left for later
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                continue
+        self._read_to += end
+
+    def append(self, records: List[Dict]) -> None:
+        """Append records durably; callers hold the "archive" store lock."""
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self.path, "ab") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                # Don't glue onto a torn line left by a crash
+                with open(self.path, "rb") as check:
+                    check.seek(size - 1)
+                    if check.read(1) != b"\n":
+                        payload = "\n" + payload
+            f.write(payload.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+_locations: Dict[str, Tuple[int, int, int]] = {}
+_summaries: Dict[str, Dict] = {}
+_state = {"current_segment": 0, "max_case_number": 0}
+
+
+def _apply_index(record: Dict) -> None:
+    case_id = record.get("id")
+    if record.get("removed"):
+        _locations.pop(case_id, None)
+        return
+    segment, offset, length = record["at"]
+    _locations[case_id] = (segment, offset, length)
+    _state["current_segment"] = max(_state["current_segment"], segment)
+    _state["max_case_number"] = max(_state["max_case_number"], _case_number(case_id))
+
+
+def _apply_listing(record: Dict) -> None:
+    # Re-insert so the dict stays in archive order
+    _summaries.pop(record.get("id"), None)
+    _summaries[record.get("id")] = record
+
+
+_index_log = _Log(ARCHIVE_INDEX_FILE, _apply_index)
+_listing_log = _Log(ARCHIVE_LISTING_FILE, _apply_listing)
+_refresh_lock = threading.Lock()
+
+
+def _load_index() -> Dict[str, Tuple[int, int, int]]:
+    """Case ID -> (segment, offset, length), including other workers' appends."""
+    with _refresh_lock:
+        _index_log.refresh()
+    return _locations
+
+
+def _segment_path(number: int) -> Path:
+    return ARCHIVE_DIR / f"segment-{number:05d}.jsonl.gz"
+
+
+def _case_number(case_id: str) -> int:
+    try:
+        return int(str(case_id).split("-")[-1])
+    except (ValueError, TypeError):
+        return 0
+
+
+def is_archivable(case: Dict, now: float) -> bool:
+    """Closed cases whose decision (or receipt) is older than ARCHIVE_AFTER_DAYS."""
+    if case.get("status") not in CLOSED_STATUSES:
+        return False
+    stamp = case.get("decided_at") or case.get("received_date")
+    try:
+        closed_at = datetime.fromisoformat(stamp).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return now - closed_at >= ARCHIVE_AFTER_DAYS * 86400
+
+
+def append_cases(cases: List[Dict]) -> int:
+    """Append cases to the current segment as one gzip member and index them.
+
+    Cases already in the archive are skipped. Returns the number appended.
+    """
+    with store_service.lock("archive"):
+        locations = _load_index()
+        cases = [case for case in cases if case.get("id") not in locations]
+        if not cases:
+            return 0
+
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        segment = _state["current_segment"] or 1
+        path = _segment_path(segment)
+        if path.exists() and path.stat().st_size >= SEGMENT_MAX_BYTES:
+            segment += 1
+            path = _segment_path(segment)
+
+        payload = "".join(json.dumps(case, ensure_ascii=False) + "\n" for case in cases)
+        member = gzip.compress(payload.encode("utf-8"))
+        with open(path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Summaries first: a listing line without an index entry is ignored
+        _listing_log.append([{field: case.get(field) for field in SUMMARY_FIELDS} for case in cases])
+        _index_log.append([{"id": case["id"], "at": [segment, offset, len(member)]} for case in cases])
+        _load_index()
+    return len(cases)
+
+
+def get_case(case_id: str) -> Optional[Dict]:
+    """Read one archived case, decompressing only the gzip member holding it."""
+    location = _load_index().get(case_id)
+    if not location:
+        return None
+
+    segment, offset, length = location
+    with open(_segment_path(segment), "rb") as f:
+        f.seek(offset)
+        member = f.read(length)
+    for line in gzip.decompress(member).decode("utf-8").splitlines():
+        case = json.loads(line)
+        if case.get("id") == case_id:
+            return case
+    return None
+
+
+def iter_cases() -> Iterator[Dict]:
+    """Yield every archived case in full, decompressing each gzip member once."""
+    members: Dict[tuple, set] = {}
+    for case_id, location in _load_index().items():
+        members.setdefault(location, set()).add(case_id)
+
+    for (segment, offset, length), case_ids in sorted(members.items()):
+        with open(_segment_path(segment), "rb") as f:
+            f.seek(offset)
+            member = f.read(length)
+        for line in gzip.decompress(member).decode("utf-8").splitlines():
+            case = json.loads(line)
+            # Cases moved back to the hot store keep their bytes here; skip them
+            if case.get("id") in case_ids:
+                yield case
+
+
+def list_case_summaries(offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Dict]]:
+    """Archived case summaries, most recently archived first.
+
+    Returns the total number of archived cases and the requested page.
+    """
+    locations = _load_index()
+    with _refresh_lock:
+        _listing_log.refresh()
+        live = [summary for case_id, summary in reversed(_summaries.items()) if case_id in locations]
+    end = None if limit is None else offset + limit
+    return len(live), [{**summary, "archived": True} for summary in live[offset:end]]
+
+
+def max_case_number() -> int:
+    """Highest case-XXX number ever archived, so new IDs are never reused."""
+    _load_index()
+    return _state["max_case_number"]
+
+
+def remove_case(case_id: str) -> None:
+    """Record that a case moved back to the hot store.
+
+    Only a one-line tombstone is appended; segments are never rewritten.
+    """
+    if case_id not in _load_index():
+        return
+    with store_service.lock("archive"):
+        if case_id in _load_index():
+            _index_log.append([{"id": case_id, "removed": True}])
+            _load_index()
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from services import preprocess_service, store_service
+
+SERVER_ROOT = Path(__file__).parent.parent
+UPLOAD_DIR = SERVER_ROOT / "uploads"
+BLOB_DIR = UPLOAD_DIR / "blobs"
+BLOBS_FILE = SERVER_ROOT / "data" / "blobs.json"
+
+# Blobs never change once written, so clients may cache them indefinitely.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Unreferenced blobs (their case was never created, or an ingest aborted) are
+# deleted once they have gone this long without being stored again; the grace
+# period covers the gap between put_blob and the case taking its reference.
+GC_GRACE_SECONDS = float(os.getenv("PRISM_BLOB_GC_GRACE_HOURS", "24")) * 3600
+
+
+def _hash_content(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _blob_path(content_hash: str, suffix: str) -> Path:
+    """Sharded location for a blob: blobs/ab/cd/abcd....pdf"""
+    return BLOB_DIR / content_hash[:2] / content_hash[2:4] / f"{content_hash}{suffix}"
+
+
+def _load_index() -> Dict[str, Dict]:
+    if not BLOBS_FILE.exists():
+        return {}
+
+    with open(BLOBS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(index: Dict[str, Dict]) -> None:
+    """Save the blob index, replacing the old file atomically.
+
+    Callers hold the "blobs" store lock for the whole read-modify-write.
+    """
+    store_service.write_json(BLOBS_FILE, index, indent=2)
+
+
+def put_blob(content: bytes, filename: str = "") -> Dict:
+    """Store content by its SHA-256 hash, reusing an existing blob if present.
+
+    Returns the blob entry with ``hash``, ``path`` (relative to the server root)
+    and ``deduplicated`` set when the content was already stored.
+    """
+    content_hash = _hash_content(content)
+    with store_service.lock("blobs"):
+        index = _load_index()
+
+        entry = index.get(content_hash)
+        if entry and (SERVER_ROOT / entry["path"]).exists():
+            if not entry["refs"]:
+                # Restart the grace period so GC doesn't race the caller's add_refs
+                entry["last_put_at"] = datetime.now(timezone.utc).isoformat()
+                _save_index(index)
+            return {"hash": content_hash, **entry, "deduplicated": True}
+
+        suffix = Path(filename).suffix.lower() if filename else ""
+        path = _blob_path(content_hash, suffix)
+        if not path.exists():
+            store_service.atomic_write(path, content)
+
+        entry = {
+            "path": path.relative_to(SERVER_ROOT).as_posix(),
+            "size": len(content),
+            "original_filename": filename,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "last_put_at": datetime.now(timezone.utc).isoformat(),
+            "refs": entry.get("refs", []) if entry else [],
+        }
+        index[content_hash] = entry
+        _save_index(index)
+    return {"hash": content_hash, **entry, "deduplicated": False}
+
+
+def add_refs(refs: Iterable[Tuple[str, str]]) -> None:
+    """Record several (blob hash, case id) references with one index write."""
+    with store_service.lock("blobs"):
+        index = _load_index()
+        for content_hash, case_id in refs:
+            entry = index.get(content_hash)
+            if not entry:
+                raise ValueError(f"Blob '{content_hash}' not found")
+            if case_id not in entry["refs"]:
+                entry["refs"].append(case_id)
+        _save_index(index)
+
+
+def collect_garbage(grace_seconds: float = GC_GRACE_SECONDS) -> List[str]:
+    """Delete blobs no case references that were last stored over ``grace_seconds`` ago.
+
+    Returns the hashes of the deleted blobs.
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    with store_service.lock("blobs"):
+        index = _load_index()
+        removed = []
+        for content_hash, entry in list(index.items()):
+            if entry["refs"]:
+                continue
+            try:
+                stored_at = datetime.fromisoformat(entry.get("last_put_at") or entry["created_at"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                stored_at = now
+            if now - stored_at < grace_seconds:
+                continue
+            (SERVER_ROOT / entry["path"]).unlink(missing_ok=True)
+            preprocess_service.discard(content_hash)
+            del index[content_hash]
+            removed.append(content_hash)
+        if removed:
+            _save_index(index)
+    return removed
+
+
+class UploadStaticFiles(StaticFiles):
+    """Static file serving for /uploads with content-hash ETags for blobs.
+
+    Range requests and If-None-Match handling come from Starlette's
+    ``FileResponse``; blobs additionally get a strong ETag equal to their hash
+    and an immutable Cache-Control header, so PDF viewers never re-download them.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        path = Path(full_path).resolve()
+        if BLOB_DIR.resolve() not in path.parents:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{path.stem}"'
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
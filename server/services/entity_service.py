@@ -1,18 +1,15 @@
 import asyncio
 import os
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
-from azure.core.exceptions import AzureError
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from azure.ai.textanalytics import TextAnalyticsClient
 
-load_dotenv()
+# The Azure SDK is imported on first use to keep server startup fast
+_language_client: Optional["TextAnalyticsClient"] = None
 
-_language_client: Optional[TextAnalyticsClient] = None
 
-
-def _get_language_client() -> TextAnalyticsClient:
+def _get_language_client() -> "TextAnalyticsClient":
     global _language_client
     if _language_client:
         return _language_client
@@ -22,16 +19,29 @@ def _get_language_client() -> TextAnalyticsClient:
     if not endpoint or not key:
         raise RuntimeError("Azure Language credentials are missing.")
 
+    from azure.ai.textanalytics import TextAnalyticsClient
+    from azure.core.credentials import AzureKeyCredential
+
     _language_client = TextAnalyticsClient(endpoint=endpoint, credential=AzureKeyCredential(key))
     return _language_client
 
 
+def warm_up() -> bool:
+    """Create the pooled client ahead of the first request; False if not configured."""
+    try:
+        _get_language_client()
+    except RuntimeError:
+        return False
+    return True
+
+
 async def extract_medical_entities(text: str) -> Dict[str, List[str]]:
     """Extract healthcare entities from text using Azure AI Language healthcare analysis."""
     if not text:
         return {"entities": []}
 
     client = _get_language_client()
+    from azure.core.exceptions import AzureError
 
     try:
         poller = await asyncio.to_thread(client.begin_analyze_healthcare_entities, [text])
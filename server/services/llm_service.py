@@ -1,15 +1,15 @@
 import asyncio
 import json
 import os
-from typing import List, Literal, Optional
+from typing import TYPE_CHECKING, List, Literal, Optional
 
-from dotenv import load_dotenv
-from openai import OpenAI
 from pydantic import BaseModel, Field, validator
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
-_openai_client: Optional[OpenAI] = None
+# The OpenAI SDK is imported on first use to keep server startup fast
+_openai_client: Optional["OpenAI"] = None
 MODEL_NAME = "gpt-4o"
 
 
@@ -44,7 +44,7 @@ class PolicyDecision(BaseModel):
         return value
 
 
-def _get_openai_client() -> OpenAI:
+def _get_openai_client() -> "OpenAI":
     global _openai_client
     if _openai_client:
         return _openai_client
@@ -53,6 +53,8 @@ def _get_openai_client() -> OpenAI:
     if not token:
         raise RuntimeError("GITHUB_TOKEN is not set; cannot initialize GitHub Models client.")
 
+    from openai import OpenAI
+
     _openai_client = OpenAI(
         base_url="https://models.inference.ai.azure.com",
         api_key=token,
@@ -60,6 +62,15 @@ def _get_openai_client() -> OpenAI:
     return _openai_client
 
 
+def warm_up() -> bool:
+    """Create the pooled client ahead of the first request; False if not configured."""
+    try:
+        _get_openai_client()
+    except RuntimeError:
+        return False
+    return True
+
+
 async def evaluate_medical_policy(
     policy_text: str,
     patient_note: str,
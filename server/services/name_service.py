@@ -0,0 +1,134 @@
+import logging
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from services import ocr_service
+
+logger = logging.getLogger("prism.names")
+
+# Page ranges OCR'd, in order, when detecting the patient name. Names almost
+# always sit on the cover sheet, so later pages are only read when the
+# earlier ones have no labelled name; their text is added to what we have.
+NAME_DETECTION_PAGE_RANGES = ("1", "2-3")
+
+
+class NameDetection(NamedTuple):
+    """Outcome of first-page name detection."""
+
+    name: Optional[str]
+    # Text OCR'd so far and how many leading pages it covers, so a later
+    # full-document pass only needs to read the rest
+    text: str
+    pages_read: int
+
+
+def guess_patient_name_from_text(text: str, labelled_only: bool = False) -> Optional[str]:
+    """Heuristically pull a patient name from OCR'd text and strip labels.
+
+    Handles patterns like:
+    - "Patient Name: Jane Doe"
+    - "Name - John Smith"
+    - "Name: Tharun" → "Tharun"
+    - Single-word names
+
+    With ``labelled_only`` only lines carrying a name label are considered;
+    the short-line fallback (which happily returns "Fax -") is skipped.
+    """
+    if not text:
+        return None
+
+    def _clean_candidate(s: str) -> str:
+        s = s.strip()
+        # Strip common label prefixes with optional punctuation
+        s = re.sub(r"^(patient\s*name|member\s*name|patient|name)\s*[:\-–—]*\s*",
+                   "", s, flags=re.IGNORECASE)
+        s = s.strip(" -:|\t")
+        # Remove non-name characters (keep letters, spaces, apostrophes, hyphens, dots)
+        s = re.sub(r"[^A-Za-z\s\.'-]", "", s).strip()
+        # Trim to at most 4 words
+        parts = [p for p in s.split() if p]
+        if parts and parts[0].lower() in {"name", "patient", "member"}:
+            parts = parts[1:]
+        parts = parts[:4]
+        return " ".join(parts)
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    candidates = []
+
+    # Look for common prefixes
+    prefixes = ["patient name", "member name", "name", "patient"]
+    for line in lines[:120]:  # limit scan for performance
+        lower_line = line.lower()
+        if any(prefix in lower_line for prefix in prefixes):
+            # Split on common separators if present, else take full line
+            parts = re.split(r"[:\-–—]", line, maxsplit=1)
+            candidate = parts[1] if len(parts) > 1 else line
+            cleaned = _clean_candidate(candidate)
+            if 1 <= len(cleaned.split()) <= 4:
+                candidates.append(cleaned)
+
+    # Fallback: first reasonably short line that looks like a name (1-4 words)
+    if not candidates and not labelled_only:
+        for line in lines[:80]:
+            cleaned = _clean_candidate(line)
+            if 1 <= len(cleaned.split()) <= 4 and cleaned:
+                candidates.append(cleaned)
+
+    if candidates:
+        # Prefer shortest plausible candidate to avoid long sentences
+        best = sorted(candidates, key=len)[0]
+        return best.title()
+    return None
+
+
+async def detect_patient_name(content: bytes) -> NameDetection:
+    """Find a labelled patient name by OCR'ing only the first page(s) of a document.
+
+    ``name`` is None when no labelled name is found, so callers can fall back
+    and schedule a pass over the remaining pages.
+    """
+    text = ""
+    pages_read = 0
+    for attempt, pages in enumerate(NAME_DETECTION_PAGE_RANGES):
+        try:
+            page_text = await ocr_service.extract_text_from_pdf(content, pages=pages)
+        except Exception as exc:  # noqa: BLE001
+            if attempt == 0:
+                raise
+            # e.g. a one-page document has no pages 2-3
+            logger.info(f"Stopped name detection at pages {pages}: {exc}")
+            break
+        text = f"{text}\n{page_text}" if text else page_text
+        pages_read = int(pages.split("-")[-1])
+        name = guess_patient_name_from_text(text, labelled_only=True)
+        if name:
+            return NameDetection(name, text, pages_read)
+    return NameDetection(None, text, pages_read)
+
+
+def remaining_pages(content: bytes, pages_read: int) -> Optional[str]:
+    """Page range after the first ``pages_read`` pages, for ``extract_text_from_pdf``.
+
+    Returns "" when there are no more pages, and None (the whole document)
+    when nothing was read yet or the page count can't be determined.
+    """
+    if not pages_read:
+        return None
+    try:
+        import pymupdf
+
+        with pymupdf.open(stream=content, filetype="pdf") as doc:
+            page_count = doc.page_count
+    except Exception as exc:  # noqa: BLE001
+        logger.info(f"Could not count pages, reading the whole document: {exc}")
+        return None
+    if page_count <= pages_read:
+        return ""
+    return f"{pages_read + 1}-{page_count}"
+
+
+def name_from_filename(filename: str) -> str:
+    """Fallback patient name derived from an uploaded file's name."""
+    stem = Path(filename or "").stem.replace("_", " ").strip()
+    return stem.title() if stem else "Unknown Patient"
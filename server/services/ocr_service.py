@@ -1,19 +1,16 @@
 import asyncio
 import io
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
-from azure.core.exceptions import AzureError
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from azure.ai.formrecognizer import DocumentAnalysisClient
 
-load_dotenv()
+# The Azure SDK is imported on first use to keep server startup fast
+_doc_client: Optional["DocumentAnalysisClient"] = None
 
-_doc_client: Optional[DocumentAnalysisClient] = None
 
-
-def _get_doc_client() -> DocumentAnalysisClient:
+def _get_doc_client() -> "DocumentAnalysisClient":
     global _doc_client
     if _doc_client:
         return _doc_client
@@ -23,13 +20,31 @@ def _get_doc_client() -> DocumentAnalysisClient:
     if not endpoint or not key:
         raise RuntimeError("Azure Document Intelligence credentials are missing.")
 
+    from azure.ai.formrecognizer import DocumentAnalysisClient
+    from azure.core.credentials import AzureKeyCredential
+
     _doc_client = DocumentAnalysisClient(endpoint=endpoint, credential=AzureKeyCredential(key))
     return _doc_client
 
 
-async def extract_text_from_pdf(file_stream: bytes) -> str:
-    """Extract text from a PDF using Azure Document Intelligence prebuilt-read."""
+def warm_up() -> bool:
+    """Create the pooled client ahead of the first request; False if not configured."""
+    try:
+        _get_doc_client()
+    except RuntimeError:
+        return False
+    return True
+
+
+async def extract_text_from_pdf(file_stream: bytes, pages: Optional[str] = None) -> str:
+    """Extract text from a PDF using Azure Document Intelligence prebuilt-read.
+
+    ``pages`` restricts analysis to a page range (e.g. ``"1"`` or ``"1-3"``);
+    when omitted the whole document is read. Callers pass documents through
+    ``preprocess_service.prepare_for_ocr`` once beforehand.
+    """
     client = _get_doc_client()
+    from azure.core.exceptions import AzureError
 
     try:
         # --- DEBUG START ---
@@ -47,7 +62,7 @@ async def extract_text_from_pdf(file_stream: bytes) -> str:
             print(f"WARNING: File does not start with PDF magic bytes!")
             print(f"First 50 bytes: {file_stream[:50]}")
         # --- DEBUG END ---
-        
+
         # Convert bytes to file-like object with seek support
         file_obj = io.BytesIO(file_stream)
         
@@ -55,7 +70,8 @@ async def extract_text_from_pdf(file_stream: bytes) -> str:
         poller = await asyncio.to_thread(
             client.begin_analyze_document, 
             "prebuilt-read", 
-            document=file_obj
+            document=file_obj,
+            pages=pages,
         )
         result = await asyncio.to_thread(poller.result)
         return result.content or ""
@@ -1,11 +1,14 @@
 import json
-import os
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from services import archive_service, blob_service, provider_service, search_service, store_service
+
 PATIENTS_FILE = Path(__file__).parent.parent / "data" / "patients.json"
-PROVIDERS_FILE = Path(__file__).parent.parent / "data" / "providers.json"
+# OCR text of each analysed document, one file per case; the search index is
+# rebuilt from here, so it is kept for archived cases too
+OCR_TEXT_DIR = Path(__file__).parent.parent / "data" / "ocr"
 
 
 def get_all_patients() -> List[Dict]:
@@ -17,76 +20,101 @@ def get_all_patients() -> List[Dict]:
         return json.load(f)
 
 
+def list_patients(include_archived: bool = False) -> List[Dict]:
+    """All hot cases, optionally followed by summaries of every archived one."""
+    patients = get_all_patients()
+    if include_archived:
+        patients.extend(archive_service.list_case_summaries()[1])
+    return patients
+
+
+def list_archived_patients(offset: int = 0, limit: int = 50) -> Dict:
+    """One page of archived case summaries, most recently archived first."""
+    total, results = archive_service.list_case_summaries(offset=offset, limit=limit)
+    return {"total": total, "offset": offset, "results": results}
+
+
 def get_patient_by_id(patient_id: str) -> Optional[Dict]:
-    """Get a specific patient case by ID."""
+    """Get a specific patient case by ID, looking in the archive if needed."""
     patients = get_all_patients()
     for patient in patients:
         if patient.get("id") == patient_id:
             return patient
+
+    archived = archive_service.get_case(patient_id)
+    if archived:
+        return {**archived, "archived": True}
     return None
 
 
-def get_provider_by_id(provider_id: str) -> Optional[Dict]:
-    """Get a specific provider by ID."""
-    if not PROVIDERS_FILE.exists():
-        return None
-    
-    with open(PROVIDERS_FILE, "r", encoding="utf-8") as f:
-        providers = json.load(f)
-    
-    for provider in providers:
-        if provider.get("id") == provider_id:
-            return provider
-    return None
+def _find_case(patients: List[Dict], patient_id: str) -> Optional[Dict]:
+    """Find a case for update, moving it back from the archive into ``patients``.
 
+    Callers save ``patients`` and then call ``archive_service.remove_case``.
+    """
+    for patient in patients:
+        if patient.get("id") == patient_id:
+            return patient
 
-def get_all_providers() -> List[Dict]:
-    """Get all providers from the database."""
-    if not PROVIDERS_FILE.exists():
-        return []
-    
-    with open(PROVIDERS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    archived = archive_service.get_case(patient_id)
+    if archived:
+        patients.append(archived)
+    return archived
 
 
-def create_patient_case(
-    patient_name: str,
-    policy_id: str,
-    policy_name: str,
-    file_path: str,
-    provider_id: str = None,
-    sla_hours: int = 72,
-) -> Dict:
-    """Create a new patient case entry."""
-    patients = get_all_patients()
-    
-    # Generate a unique incremental case ID based on the highest existing numeric suffix
-    existing_ids = {patient.get("id") for patient in patients if patient.get("id")}
+def archive_closed_cases() -> int:
+    """Move closed cases older than the archive threshold out of patients.json.
+
+    Runs under the "patients" store lock like every other write to the hot
+    store, so cases created or updated by request handlers (in this or another
+    worker) are never lost. Cases are appended to the archive before the hot
+    store is rewritten, so a crash in between leaves a case in both places
+    rather than neither. Returns the number of cases archived.
+    """
+    with store_service.lock("patients"):
+        patients = get_all_patients()
+        now = datetime.now(timezone.utc).timestamp()
+        cold = [patient for patient in patients if archive_service.is_archivable(patient, now)]
+        if not cold:
+            return 0
+
+        archive_service.append_cases(cold)
+        cold_ids = {patient["id"] for patient in cold}
+        _save_patients([patient for patient in patients if patient.get("id") not in cold_ids])
+    return len(cold)
+
+
+def _next_case_number(patients: List[Dict]) -> int:
+    """Return the number after the highest existing or archived case-XXX suffix."""
     existing_numbers = []
-    for pid in existing_ids:
+    for patient in patients:
         try:
             # Expect format case-XXX; ignore malformed IDs instead of crashing
-            existing_numbers.append(int(str(pid).split("-")[-1]))
+            existing_numbers.append(int(str(patient.get("id")).split("-")[-1]))
         except (ValueError, TypeError):
             continue
-    next_number = (max(existing_numbers) if existing_numbers else 0) + 1
-    case_id = f"case-{next_number:03d}"
+    highest = max(existing_numbers) if existing_numbers else 0
+    # Archived cases still own their IDs
+    return max(highest, archive_service.max_case_number()) + 1
 
-    # Guard against accidental collision (e.g., simultaneous writes)
-    while case_id in existing_ids:
-        next_number += 1
-        case_id = f"case-{next_number:03d}"
-    
-    # Load provider info if provided
-    provider = None
-    provider_name = None
-    if provider_id:
-        provider = get_provider_by_id(provider_id)
-        if provider:
-            provider_name = provider.get("name")
+
+def _build_case(
+    case_id: str,
+    patient_name: str,
+    policy_id: str,
+    policy_name: str,
+    file_path: str,
+    provider_id: Optional[str],
+    provider: Optional[Dict],
+    gold_card: Optional[Dict],
+    sla_hours: int,
+    file_hash: Optional[str],
+) -> Dict:
+    """Build a new case record, auto-approving gold card providers."""
+    provider_name = provider.get("name") if provider else None
     
-    # Check if provider has GOLD_CARD status for auto-approval
-    is_gold_card = provider and provider.get("status") == "GOLD_CARD"
+    # Check if provider is currently gold card eligible for auto-approval
+    is_gold_card = provider and gold_card and gold_card["eligible"]
     
     # Create analysis result for GOLD_CARD providers
     analysis_result = None
@@ -96,7 +124,7 @@ def create_patient_case(
         # Auto-approve for GOLD_CARD providers
         analysis_result = {
             "status": "AUTO_APPROVED",
-            "reasoning": f"Provider holds active Gold Card ({provider.get('approval_rate', 98)}% Approval Rate). AI Review bypassed under State Law exemption: {provider.get('exemption', 'N/A')}.",
+            "reasoning": f"Provider holds active Gold Card ({gold_card.get('approval_rate') or 98}% Approval Rate). AI Review bypassed under State Law exemption: {provider.get('exemption', 'N/A')}.",
             "summary": "Gold Card Provider - Automatic Approval",
             "evidence_quote": "N/A - Regulatory Auto-Approval",
             "criteria_met": True,
@@ -107,7 +135,7 @@ def create_patient_case(
         }
         status = "AUTO_APPROVED"
     
-    new_case = {
+    return {
         "id": case_id,
         "patient_name": patient_name,
         "policy_id": policy_id,
@@ -119,47 +147,164 @@ def create_patient_case(
         "sla_hours": sla_hours,
         "sla_remaining_hours": sla_hours,
         "file_path": file_path,
+        "file_hash": file_hash,
         "analysis_result": analysis_result,
         "rfi_sent": False,
         "rfi_sent_at": None,
     }
-    
-    patients.append(new_case)
-    _save_patients(patients)
-    
-    return new_case
 
 
-def update_patient_analysis(patient_id: str, analysis_result: Dict) -> Dict:
-    """Update patient case with analysis results."""
-    patients = get_all_patients()
-    
-    for patient in patients:
-        if patient.get("id") == patient_id:
-            patient["analysis_result"] = analysis_result
-            patient["status"] = analysis_result.get("status", "UNKNOWN")
-            _save_patients(patients)
-            return patient
-    
-    raise ValueError(f"Patient case '{patient_id}' not found")
+def create_patient_case(
+    patient_name: str,
+    policy_id: str,
+    policy_name: str,
+    file_path: str,
+    provider_id: str = None,
+    sla_hours: int = 72,
+    file_hash: str = None,
+) -> Dict:
+    """Create a new patient case entry.
+
+    When ``file_hash`` is given the case is registered as a reference on that
+    blob in the upload blob store.
+    """
+    return create_patient_cases([
+        {
+            "patient_name": patient_name,
+            "policy_id": policy_id,
+            "policy_name": policy_name,
+            "file_path": file_path,
+            "provider_id": provider_id,
+            "sla_hours": sla_hours,
+            "file_hash": file_hash,
+        }
+    ])[0]
+
+
+def create_patient_cases(cases: List[Dict]) -> List[Dict]:
+    """Create several patient cases with a single store write.
+
+    Each item takes the same keys as ``create_patient_case`` arguments. New
+    cases get contiguous case-XXX ids in the order given.
+    """
+    if not cases:
+        return []
+
+    with store_service.lock("patients"):
+        patients = get_all_patients()
+        next_number = _next_case_number(patients)
+
+        new_cases = []
+        for offset, case in enumerate(cases):
+            provider_id = case.get("provider_id")
+            provider = provider_service.get_provider_by_id(provider_id) if provider_id else None
+            new_cases.append(_build_case(
+                case_id=f"case-{next_number + offset:03d}",
+                patient_name=case["patient_name"],
+                policy_id=case["policy_id"],
+                policy_name=case.get("policy_name", ""),
+                file_path=case["file_path"],
+                provider_id=provider_id,
+                provider=provider,
+                gold_card=provider_service.get_gold_card_status(provider_id) if provider else None,
+                sla_hours=case.get("sla_hours", 72),
+                file_hash=case.get("file_hash"),
+            ))
+
+        patients.extend(new_cases)
+        _save_patients(patients)
+        provider_service.record_cases_created(new_cases)
+    search_service.index_cases(new_cases)
+
+    blob_refs = [(case["file_hash"], case["id"]) for case in new_cases if case["file_hash"]]
+    if blob_refs:
+        blob_service.add_refs(blob_refs)
+
+    return new_cases
+
+
+def update_patient_analysis(
+    patient_id: str,
+    analysis_result: Dict,
+    ocr_text: Optional[str] = None,
+) -> Dict:
+    """Update patient case with analysis results.
+
+    The first decision on a case stamps ``decided_at`` so provider turnaround
+    statistics can be maintained incrementally. ``ocr_text`` is saved with the
+    case (see ``get_case_text``) and indexed for search.
+    """
+    with store_service.lock("patients"):
+        patients = get_all_patients()
+        patient = _find_case(patients, patient_id)
+        if not patient:
+            raise ValueError(f"Patient case '{patient_id}' not found")
+
+        previous_status = patient.get("status", "PENDING")
+        patient["analysis_result"] = analysis_result
+        patient["status"] = analysis_result.get("status", "UNKNOWN")
+        first_decision = (
+            not patient.get("decided_at")
+            and patient["status"] in provider_service.DECISION_STATUSES
+        )
+        if first_decision:
+            patient["decided_at"] = datetime.now(timezone.utc).isoformat()
+        _save_patients(patients)
+        archive_service.remove_case(patient_id)
+        provider_service.record_status_change(patient, previous_status, first_decision)
+    if ocr_text is not None:
+        save_case_text(patient_id, ocr_text)
+    search_service.index_case(patient, ocr_text)
+    return patient
+
+
+def update_patient_name(patient_id: str, patient_name: str) -> Dict:
+    """Update the patient name on an existing case."""
+    with store_service.lock("patients"):
+        patients = get_all_patients()
+        patient = _find_case(patients, patient_id)
+        if not patient:
+            raise ValueError(f"Patient case '{patient_id}' not found")
+
+        patient["patient_name"] = patient_name
+        _save_patients(patients)
+        archive_service.remove_case(patient_id)
+    search_service.index_case(patient)
+    return patient
 
 
 def mark_rfi_sent(patient_id: str, message: str = "") -> Dict:
     """Mark that an RFI has been sent for this patient case."""
-    patients = get_all_patients()
-    
-    for patient in patients:
-        if patient.get("id") == patient_id:
-            patient["rfi_sent"] = True
-            patient["rfi_sent_at"] = datetime.now(timezone.utc).isoformat()
-            patient["rfi_message"] = message
-            _save_patients(patients)
-            return patient
-    
-    raise ValueError(f"Patient case '{patient_id}' not found")
+    with store_service.lock("patients"):
+        patients = get_all_patients()
+        patient = _find_case(patients, patient_id)
+        if not patient:
+            raise ValueError(f"Patient case '{patient_id}' not found")
+
+        patient["rfi_sent"] = True
+        patient["rfi_sent_at"] = datetime.now(timezone.utc).isoformat()
+        patient["rfi_message"] = message
+        _save_patients(patients)
+        archive_service.remove_case(patient_id)
+    return patient
+
+
+def save_case_text(patient_id: str, text: str) -> None:
+    """Store the OCR text of a case's document."""
+    store_service.atomic_write(OCR_TEXT_DIR / f"{patient_id}.txt", text.encode("utf-8"))
+
+
+def get_case_text(patient_id: str) -> Optional[str]:
+    """Return the stored OCR text for a case, if any."""
+    path = OCR_TEXT_DIR / f"{patient_id}.txt"
+    if not path.exists():
+        return None
+    return path.read_text(encoding="utf-8")
 
 
 def _save_patients(patients: List[Dict]) -> None:
-    """Save patients list to JSON file."""
-    with open(PATIENTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(patients, f, indent=2, ensure_ascii=False)
+    """Save patients list to JSON file.
+
+    Callers hold the "patients" store lock for the whole read-modify-write.
+    """
+    store_service.write_json(PATIENTS_FILE, patients, indent=2, ensure_ascii=False)
@@ -3,25 +3,42 @@ import os
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from services import store_service
+
 POLICIES_FILE = Path(__file__).parent.parent / "data" / "policies.json"
 
+# In-memory policy registry keyed by ID, reloaded when policies.json changes
+_policies_by_id: Dict[str, Dict[str, str]] = {}
+_policies_mtime: Optional[float] = None
+
+
+def _policy_index() -> Dict[str, Dict[str, str]]:
+    global _policies_by_id, _policies_mtime
+    if not POLICIES_FILE.exists():
+        _policies_by_id, _policies_mtime = {}, None
+        return _policies_by_id
+
+    mtime = POLICIES_FILE.stat().st_mtime
+    if mtime != _policies_mtime:
+        with open(POLICIES_FILE, "r", encoding="utf-8") as f:
+            _policies_by_id = {p.get("id"): p for p in json.load(f)}
+        _policies_mtime = mtime
+    return _policies_by_id
+
+
+def warm_up() -> int:
+    """Load the policy registry ahead of the first request; returns the policy count."""
+    return len(_policy_index())
+
 
 def get_all_policies() -> List[Dict[str, str]]:
     """Read and return all policies from the JSON data store."""
-    if not POLICIES_FILE.exists():
-        return []
-    
-    with open(POLICIES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return list(_policy_index().values())
 
 
 def get_policy_by_id(policy_id: str) -> Optional[Dict[str, str]]:
     """Get a specific policy by ID."""
-    policies = get_all_policies()
-    for policy in policies:
-        if policy.get("id") == policy_id:
-            return policy
-    return None
+    return _policy_index().get(policy_id)
 
 
 def get_policy_text(policy_id: str) -> str:
@@ -34,20 +51,23 @@ def get_policy_text(policy_id: str) -> str:
 
 def upload_policy(policy_data: Dict[str, str]) -> Dict[str, str]:
     """Add a new policy to the data store."""
-    policies = get_all_policies()
-    
     # Generate ID from name if not provided
     if "id" not in policy_data:
         policy_data["id"] = policy_data["name"].lower().replace(" ", "-")
-    
-    # Check for duplicate ID
-    if any(p.get("id") == policy_data["id"] for p in policies):
-        raise ValueError(f"Policy with ID '{policy_data['id']}' already exists")
-    
-    policies.append(policy_data)
-    
-    # Write back to file
-    with open(POLICIES_FILE, "w", encoding="utf-8") as f:
-        json.dump(policies, f, indent=2, ensure_ascii=False)
-    
+
+    with store_service.lock("policies"):
+        policies = []
+        if POLICIES_FILE.exists():
+            with open(POLICIES_FILE, "r", encoding="utf-8") as f:
+                policies = json.load(f)
+
+        # Check for duplicate ID
+        if any(p.get("id") == policy_data["id"] for p in policies):
+            raise ValueError(f"Policy with ID '{policy_data['id']}' already exists")
+
+        policies.append(policy_data)
+
+        # Write back to file
+        store_service.write_json(POLICIES_FILE, policies, indent=2, ensure_ascii=False)
+
     return policy_data
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from services import store_service
+
+logger = logging.getLogger("prism.preprocess")
+
+# Opt-in: page image optimization before documents are sent to OCR
+PREPROCESS_ENABLED = os.getenv("PRISM_OCR_PREPROCESS", "").lower() in {"1", "true", "yes"}
+# Files smaller than this are uploaded as-is; there is little transfer to save
+PREPROCESS_MIN_BYTES = int(os.getenv("PRISM_OCR_PREPROCESS_MIN_BYTES", str(2 * 1024 * 1024)))
+# Images above this effective resolution are resampled to it. Defaults come
+# from benchmarks/preprocess_accuracy.py: 200 DPI cost about 5 points of
+# character accuracy on 10pt text and quality 75 up to 6, while 300 DPI /
+# quality 90 stayed within 2 points and cut 600 DPI scans to about a third.
+TARGET_DPI = int(os.getenv("PRISM_OCR_TARGET_DPI", "300"))
+JPEG_QUALITY = int(os.getenv("PRISM_OCR_JPEG_QUALITY", "90"))
+GRAYSCALE = os.getenv("PRISM_OCR_GRAYSCALE", "true").lower() in {"1", "true", "yes"}
+
+# Optimized copies of stored blobs, keyed by blob hash, so each document is
+# preprocessed once however many times it is OCR'd. A ".skip" marker records
+# documents that couldn't be made smaller.
+OCR_READY_DIR = Path(__file__).parent.parent / "data" / "ocr_ready"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=int(os.getenv("PRISM_OCR_PREPROCESS_WORKERS", "2")))
+    return _pool
+
+
+def shutdown() -> None:
+    """Stop the worker processes; called when the server shuts down."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def optimize_pdf_images(
+    pdf_bytes: bytes,
+    target_dpi: int = TARGET_DPI,
+    jpeg_quality: int = JPEG_QUALITY,
+    grayscale: bool = GRAYSCALE,
+) -> Tuple[bytes, Dict]:
+    """Downsample, grayscale and recompress oversized page images in a PDF.
+
+    Runs in a worker process. Returns the rewritten PDF and per-run statistics;
+    the original bytes come back unchanged if nothing could be optimized.
+    """
+    import pymupdf
+
+    stats = {"images": 0, "optimized": 0}
+    doc = pymupdf.open(stream=pdf_bytes, filetype="pdf")
+    seen = set()
+    try:
+        for page in doc:
+            for info in page.get_image_info(xrefs=True):
+                xref = info.get("xref")
+                if not xref or xref in seen:
+                    continue
+                seen.add(xref)
+                stats["images"] += 1
+
+                # Effective DPI: image pixels over the size it is drawn on the page
+                x0, y0, x1, y1 = info["bbox"]
+                drawn_inches = max(x1 - x0, y1 - y0) / 72
+                pixels = max(info["width"], info["height"])
+                if drawn_inches <= 0:
+                    continue
+                dpi = pixels / drawn_inches
+
+                pix = pymupdf.Pixmap(doc, xref)
+                if pix.alpha or pix.n > 4:
+                    # Masked or unusual colorspaces are left alone
+                    continue
+                is_color = pix.n >= 3
+                if dpi <= target_dpi * 1.25 and not (grayscale and is_color):
+                    continue
+
+                if grayscale and is_color:
+                    pix = pymupdf.Pixmap(pymupdf.csGRAY, pix)
+                elif pix.colorspace and pix.colorspace.n == 4:
+                    pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+                if dpi > target_dpi:
+                    # Resample to the target resolution (MuPDF scales with smoothing)
+                    scale = target_dpi / dpi
+                    pix = pymupdf.Pixmap(
+                        pix, max(1, round(pix.width * scale)), max(1, round(pix.height * scale)), None
+                    )
+
+                page.replace_image(xref, stream=pix.tobytes("jpeg", jpg_quality=jpeg_quality))
+                stats["optimized"] += 1
+
+        if not stats["optimized"]:
+            return pdf_bytes, stats
+        optimized = doc.tobytes(garbage=3, deflate=True)
+    finally:
+        doc.close()
+
+    if len(optimized) >= len(pdf_bytes):
+        return pdf_bytes, stats
+    return optimized, stats
+
+
+async def optimize_for_ocr(file_bytes: bytes) -> bytes:
+    """Shrink scanned page images before OCR upload when enabled; never fails the request."""
+    if not PREPROCESS_ENABLED or len(file_bytes) < PREPROCESS_MIN_BYTES:
+        return file_bytes
+    if not file_bytes.startswith(b"%PDF"):
+        return file_bytes
+
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        optimized, stats = await loop.run_in_executor(_get_pool(), optimize_pdf_images, file_bytes)
+    except ImportError:
+        logger.warning("PyMuPDF is not installed; skipping OCR preprocessing")
+        return file_bytes
+    except Exception as exc:  # noqa: BLE001
+        logger.warning(f"OCR preprocessing failed, sending original document: {exc}")
+        return file_bytes
+
+    logger.info(
+        f"OCR preprocessing: {len(file_bytes)} -> {len(optimized)} bytes "
+        f"({stats['optimized']}/{stats['images']} images) in {time.perf_counter() - started:.2f}s"
+    )
+    return optimized
+
+
+async def prepare_for_ocr(file_bytes: bytes, content_hash: Optional[str] = None) -> bytes:
+    """The bytes to send to OCR for a document, optimized at most once per blob.
+
+    With ``content_hash`` (a stored blob) the result is cached in OCR_READY_DIR
+    and reused by later OCR calls on the same document, including later requests.
+    """
+    if not content_hash or not PREPROCESS_ENABLED or len(file_bytes) < PREPROCESS_MIN_BYTES:
+        return await optimize_for_ocr(file_bytes)
+
+    ready_path = OCR_READY_DIR / f"{content_hash}.pdf"
+    skip_path = OCR_READY_DIR / f"{content_hash}.skip"
+    if ready_path.exists():
+        return await asyncio.to_thread(ready_path.read_bytes)
+    if skip_path.exists():
+        return file_bytes
+
+    optimized = await optimize_for_ocr(file_bytes)
+    try:
+        if len(optimized) < len(file_bytes):
+            await asyncio.to_thread(store_service.atomic_write, ready_path, optimized)
+        else:
+            await asyncio.to_thread(store_service.atomic_write, skip_path, b"")
+    except OSError as exc:
+        logger.warning(f"Failed to cache preprocessed document {content_hash}: {exc}")
+    return optimized
+
+
+def discard(content_hash: str) -> None:
+    """Remove the cached OCR copy of a deleted blob."""
+    (OCR_READY_DIR / f"{content_hash}.pdf").unlink(missing_ok=True)
+    (OCR_READY_DIR / f"{content_hash}.skip").unlink(missing_ok=True)
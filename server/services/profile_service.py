@@ -0,0 +1,196 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services import admission_service
+
+logger = logging.getLogger("prism.profile")
+
+PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+PROFILE_HEADER = "x-prism-profile"
+PROFILE_ID_HEADER = "X-Prism-Profile-Id"
+
+# Requests are only profiled on demand when the header carries this token;
+# unset, the header is ignored and only sampling applies
+PROFILE_TOKEN = os.getenv("PRISM_PROFILE_TOKEN", "")
+# Profiles kept on disk; the oldest are deleted beyond this
+MAX_PROFILES = int(os.getenv("PRISM_PROFILE_MAX_PROFILES", "200"))
+# Requests profiled at once across the deployment, split between worker
+# processes; each profile runs a sampler thread
+MAX_CONCURRENT = admission_service.per_worker(int(os.getenv("PRISM_PROFILE_MAX_CONCURRENT", "2")))
+# Fraction of requests profiled without the header (0 disables sampling)
+SAMPLE_RATE = float(os.getenv("PRISM_PROFILE_SAMPLE_RATE", "0"))
+# Stack sampling interval for the event loop thread
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("PRISM_PROFILE_INTERVAL_MS", "5")) / 1000
+# A loop heartbeat later than this counts as synchronous work blocking the loop
+BLOCKING_THRESHOLD_SECONDS = float(os.getenv("PRISM_PROFILE_BLOCKING_MS", "50")) / 1000
+_HEARTBEAT_SECONDS = 0.005
+
+_current: ContextVar[Optional["RequestProfiler"]] = ContextVar("prism_profiler", default=None)
+_active = 0
+
+
+def should_profile(headers) -> bool:
+    """Profile when the request presents the profiling token, or when picked by the sampling rate."""
+    if _active >= MAX_CONCURRENT:
+        return False
+    requested = headers.get(PROFILE_HEADER, "")
+    if PROFILE_TOKEN and requested and hmac.compare_digest(requested.encode(), PROFILE_TOKEN.encode()):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def _prune_profiles() -> None:
+    """Delete the oldest profiles beyond MAX_PROFILES; IDs sort by creation time."""
+    summaries = sorted(PROFILE_DIR.glob("*.json"))
+    for summary in summaries[:max(len(summaries) - MAX_PROFILES, 0)]:
+        summary.unlink(missing_ok=True)
+        summary.with_suffix(".folded").unlink(missing_ok=True)
+
+
+def _stack_key(frame) -> str:
+    """Collapse a frame chain into 'outer;...;inner' for flame graph tools."""
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@contextmanager
+def span(name: str):
+    """Time a named stage of the current request if it is being profiled."""
+    profiler = _current.get()
+    if profiler is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.spans.append({
+            "name": name,
+            "start_ms": round((started - profiler.started) * 1000, 2),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+
+
+class RequestProfiler:
+    """Sampling profiler and event-loop blocking detector for one request.
+
+    A background thread samples the event loop thread's stack every
+    ``SAMPLE_INTERVAL_SECONDS`` and watches a heartbeat task on the loop;
+    when the heartbeat falls more than ``BLOCKING_THRESHOLD_SECONDS`` behind,
+    the stack holding the loop is recorded as a blocking event. Samples cover
+    everything running on the loop meanwhile, not only this request.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.spans: List[Dict] = []
+        self.samples: Counter = Counter()
+        self.blocking_events: List[Dict] = []
+        self.started = 0.0
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._token = None
+
+    async def __aenter__(self) -> "RequestProfiler":
+        global _active
+        _active += 1
+        self.started = self._last_beat = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._token = _current.set(self)
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._sampler = threading.Thread(target=self._sample, name="prism-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        global _active
+        _active -= 1
+        duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._heartbeat.cancel()
+        self._sampler.join()
+        _current.reset(self._token)
+        try:
+            await asyncio.to_thread(self._write, duration)
+        except OSError as exc:
+            logger.warning(f"Failed to write profile {self.id}: {exc}")
+
+    async def _beat(self) -> None:
+        while True:
+            self._last_beat = time.perf_counter()
+            await asyncio.sleep(_HEARTBEAT_SECONDS)
+
+    def _sample(self) -> None:
+        blocking: Optional[Dict] = None
+        while not self._stop.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = _stack_key(frame)
+            self.samples[stack] += 1
+
+            lag = time.perf_counter() - self._last_beat
+            if lag > BLOCKING_THRESHOLD_SECONDS:
+                if blocking is None:
+                    blocking = {
+                        "start_ms": round((self._last_beat - self.started) * 1000, 2),
+                        "stacks": Counter(),
+                    }
+                blocking["duration_ms"] = round(lag * 1000, 2)
+                blocking["stacks"][stack] += 1
+            elif blocking is not None:
+                self._close_blocking(blocking)
+                blocking = None
+        if blocking is not None:
+            self._close_blocking(blocking)
+
+    def _close_blocking(self, blocking: Dict) -> None:
+        stack, _ = blocking.pop("stacks").most_common(1)[0]
+        blocking["stack"] = stack
+        self.blocking_events.append(blocking)
+
+    def _write(self, duration: float) -> None:
+        PROFILE_DIR.mkdir(exist_ok=True)
+        folded = "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+        (PROFILE_DIR / f"{self.id}.folded").write_text(folded + "\n", encoding="utf-8")
+        summary = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(duration * 1000, 2),
+            "sample_interval_ms": SAMPLE_INTERVAL_SECONDS * 1000,
+            "sample_count": sum(self.samples.values()),
+            "spans": self.spans,
+            "blocking_events": self.blocking_events,
+            "folded_stacks": f"{self.id}.folded",
+        }
+        with open(PROFILE_DIR / f"{self.id}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        _prune_profiles()
+        logger.info(
+            f"Profile {self.id}: {summary['duration_ms']}ms, {summary['sample_count']} samples, "
+            f"{len(self.blocking_events)} blocking events"
+        )
@@ -0,0 +1,253 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services import store_service
+
+PROVIDERS_FILE = Path(__file__).parent.parent / "data" / "providers.json"
+PROVIDER_STATS_FILE = Path(__file__).parent.parent / "data" / "provider_stats.json"
+
+# Statuses that count as a reviewed decision for approval-rate purposes.
+# AUTO_APPROVED is tracked but excluded, so a gold card can't sustain itself.
+DECISION_STATUSES = ("APPROVED", "DENIED", "ACTION_REQUIRED")
+
+# Gold card eligibility: once a provider has enough reviewed decisions their
+# live approval rate decides; before that the static status in providers.json does.
+GOLD_CARD_MIN_DECISIONS = 10
+GOLD_CARD_APPROVAL_RATE = 90.0
+
+# In-memory provider index keyed by ID, reloaded when providers.json changes
+_providers_by_id: Dict[str, Dict] = {}
+_providers_mtime: Optional[float] = None
+
+# Per-provider running totals, updated incrementally under the
+# "provider_stats" store lock; reloaded if another worker process has
+# written the file since
+_stats: Optional[Dict[str, Dict]] = None
+_stats_mtime: Optional[int] = None
+
+
+def _provider_index() -> Dict[str, Dict]:
+    global _providers_by_id, _providers_mtime
+    if not PROVIDERS_FILE.exists():
+        _providers_by_id, _providers_mtime = {}, None
+        return _providers_by_id
+
+    mtime = PROVIDERS_FILE.stat().st_mtime
+    if mtime != _providers_mtime:
+        with open(PROVIDERS_FILE, "r", encoding="utf-8") as f:
+            _providers_by_id = {p.get("id"): p for p in json.load(f)}
+        _providers_mtime = mtime
+    return _providers_by_id
+
+
+def get_all_providers() -> List[Dict]:
+    """Get all providers from the database."""
+    return list(_provider_index().values())
+
+
+def get_provider_by_id(provider_id: str) -> Optional[Dict]:
+    """Get a specific provider by ID."""
+    return _provider_index().get(provider_id)
+
+
+def _empty_stats() -> Dict:
+    return {
+        "cases": 0,
+        "status_counts": {},
+        "decided_cases": 0,
+        "turnaround_hours_total": 0.0,
+    }
+
+
+def _hours_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    try:
+        started = datetime.fromisoformat(start)
+        finished = datetime.fromisoformat(end)
+    except (TypeError, ValueError):
+        return None
+    return max((finished - started).total_seconds() / 3600, 0.0)
+
+
+def _compute_stats(patients: List[Dict]) -> Dict[str, Dict]:
+    stats: Dict[str, Dict] = {}
+    for patient in patients:
+        provider_id = patient.get("provider_id")
+        if not provider_id:
+            continue
+        entry = stats.setdefault(provider_id, _empty_stats())
+        entry["cases"] += 1
+        status = patient.get("status", "UNKNOWN")
+        entry["status_counts"][status] = entry["status_counts"].get(status, 0) + 1
+        turnaround = _hours_between(patient.get("received_date"), patient.get("decided_at"))
+        if turnaround is not None:
+            entry["decided_cases"] += 1
+            entry["turnaround_hours_total"] += turnaround
+    return stats
+
+
+def rebuild_stats(patients: List[Dict]) -> Dict[str, Dict]:
+    """Recompute provider statistics from scratch and persist them."""
+    global _stats
+    stats = _compute_stats(patients)
+    with store_service.lock("provider_stats"):
+        _stats = stats
+        _save_stats()
+    return stats
+
+
+def _normalized(stats: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Stats in comparable form: empty buckets dropped, float totals rounded."""
+    return {
+        provider_id: {
+            "cases": entry["cases"],
+            "status_counts": {status: n for status, n in entry["status_counts"].items() if n},
+            "decided_cases": entry["decided_cases"],
+            "turnaround_hours_total": round(entry["turnaround_hours_total"], 3),
+        }
+        for provider_id, entry in stats.items()
+        if entry["cases"] or any(entry["status_counts"].values())
+    }
+
+
+def reconcile_stats() -> bool:
+    """Rebuild the running totals if they have drifted from the case stores.
+
+    Incremental updates can be lost (a crash between a case write and the
+    stats write, cases edited by hand), and gold card eligibility depends on
+    these numbers, so they are checked against a full scan of hot and archived
+    cases at startup and periodically. Returns True if stored totals had drifted
+    and were rebuilt.
+    """
+    global _stats
+    # Imported here because patient_service depends on this module.
+    from services import patient_service
+
+    # Lock order: patients before provider_stats, as in case updates
+    with store_service.lock("patients"), store_service.lock("provider_stats"):
+        expected = _compute_stats(patient_service.list_patients(include_archived=True))
+        existed = PROVIDER_STATS_FILE.exists()
+        if existed and _normalized(_get_stats(reload=True)) == _normalized(expected):
+            return False
+        _stats = expected
+        _save_stats()
+    # A missing file is simply the first build, not drift
+    return existed
+
+
+def _get_stats(reload: bool = False) -> Dict[str, Dict]:
+    """Current statistics; ``reload`` re-reads the file, as updates under the lock do."""
+    global _stats, _stats_mtime
+    if PROVIDER_STATS_FILE.exists():
+        mtime = PROVIDER_STATS_FILE.stat().st_mtime_ns
+        if reload or _stats is None or mtime != _stats_mtime:
+            with open(PROVIDER_STATS_FILE, "r", encoding="utf-8") as f:
+                _stats = json.load(f)
+            _stats_mtime = mtime
+        return _stats
+
+    # First run: seed the statistics with a one-off scan of existing cases.
+    # Imported here because patient_service depends on this module.
+    from services import patient_service
+
+    return rebuild_stats(patient_service.list_patients(include_archived=True))
+
+
+def _save_stats() -> None:
+    global _stats_mtime
+    store_service.write_json(PROVIDER_STATS_FILE, _stats, indent=2)
+    _stats_mtime = PROVIDER_STATS_FILE.stat().st_mtime_ns
+
+
+def record_cases_created(cases: List[Dict]) -> None:
+    """Count newly created cases towards their providers' statistics."""
+    cases = [case for case in cases if case.get("provider_id")]
+    if not cases:
+        return
+
+    with store_service.lock("provider_stats"):
+        if not PROVIDER_STATS_FILE.exists():
+            # The first-run rebuild reads the saved cases, so it counts this change
+            _get_stats()
+            return
+        stats = _get_stats(reload=True)
+        for case in cases:
+            entry = stats.setdefault(case["provider_id"], _empty_stats())
+            entry["cases"] += 1
+            status = case.get("status", "PENDING")
+            entry["status_counts"][status] = entry["status_counts"].get(status, 0) + 1
+        _save_stats()
+
+
+def record_status_change(case: Dict, previous_status: str, first_decision: bool) -> None:
+    """Move a case between status buckets after a new analysis result.
+
+    ``first_decision`` adds the case's turnaround time (received_date to
+    decided_at) to the provider's running total.
+    """
+    provider_id = case.get("provider_id")
+    if not provider_id:
+        return
+
+    with store_service.lock("provider_stats"):
+        if not PROVIDER_STATS_FILE.exists():
+            # The first-run rebuild reads the saved cases, so it counts this change
+            _get_stats()
+            return
+        stats = _get_stats(reload=True)
+        entry = stats.setdefault(provider_id, _empty_stats())
+        counts = entry["status_counts"]
+        if counts.get(previous_status, 0) > 0:
+            counts[previous_status] -= 1
+        status = case.get("status", "UNKNOWN")
+        counts[status] = counts.get(status, 0) + 1
+
+        if first_decision:
+            turnaround = _hours_between(case.get("received_date"), case.get("decided_at"))
+            if turnaround is not None:
+                entry["decided_cases"] += 1
+                entry["turnaround_hours_total"] += turnaround
+        _save_stats()
+
+
+def get_provider_stats(provider_id: str) -> Dict:
+    """Aggregated statistics for a provider, including derived rates (percent)."""
+    entry = _get_stats().get(provider_id, _empty_stats())
+    counts = entry["status_counts"]
+    reviewed = sum(counts.get(status, 0) for status in DECISION_STATUSES)
+
+    def _rate(status: str) -> Optional[float]:
+        return round(100 * counts.get(status, 0) / reviewed, 1) if reviewed else None
+
+    decided = entry["decided_cases"]
+    return {
+        "cases": entry["cases"],
+        "status_counts": dict(counts),
+        "reviewed_cases": reviewed,
+        "approvals": counts.get("APPROVED", 0),
+        "denials": counts.get("DENIED", 0),
+        "action_required": counts.get("ACTION_REQUIRED", 0),
+        "auto_approved": counts.get("AUTO_APPROVED", 0),
+        "approval_rate": _rate("APPROVED"),
+        "denial_rate": _rate("DENIED"),
+        "action_required_rate": _rate("ACTION_REQUIRED"),
+        "avg_turnaround_hours": round(entry["turnaround_hours_total"] / decided, 2) if decided else None,
+    }
+
+
+def get_gold_card_status(provider_id: str) -> Dict:
+    """Decide gold card eligibility from live statistics, falling back to the static status."""
+    provider = get_provider_by_id(provider_id) or {}
+    stats = get_provider_stats(provider_id)
+
+    if stats["reviewed_cases"] >= GOLD_CARD_MIN_DECISIONS:
+        approval_rate = stats["approval_rate"]
+        eligible = approval_rate >= GOLD_CARD_APPROVAL_RATE
+        basis = "statistics"
+    else:
+        approval_rate = provider.get("approval_rate")
+        eligible = provider.get("status") == "GOLD_CARD"
+        basis = "static"
+
+    return {"eligible": eligible, "approval_rate": approval_rate, "basis": basis}
@@ -0,0 +1,220 @@
+import html
+import itertools
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Derived data only: deleting the file rebuilds it from the case stores
+SEARCH_DB_FILE = Path(__file__).parent.parent / "data" / "search.db"
+
+# Indexed text columns, in FTS table order; bm25() weights follow the same order
+_TEXT_COLUMNS = (
+    "patient_name",
+    "policy_name",
+    "provider_name",
+    "summary",
+    "reasoning",
+    "entities",
+    "ocr_text",
+)
+_BM25_WEIGHTS = (10.0, 3.0, 3.0, 2.0, 1.0, 4.0, 1.0)
+
+# Cases live in a plain table keyed by case ID; the FTS5 index uses it as
+# external content and is kept in sync by triggers.
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    case_id TEXT NOT NULL UNIQUE,
+    status TEXT,
+    {", ".join(f"{column} TEXT" for column in _TEXT_COLUMNS)}
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+    {", ".join(_TEXT_COLUMNS)},
+    content='cases', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS cases_ai AFTER INSERT ON cases BEGIN
+    INSERT INTO cases_fts (rowid, {", ".join(_TEXT_COLUMNS)})
+    VALUES (new.id, {", ".join(f"new.{column}" for column in _TEXT_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS cases_ad AFTER DELETE ON cases BEGIN
+    INSERT INTO cases_fts (cases_fts, rowid, {", ".join(_TEXT_COLUMNS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{column}" for column in _TEXT_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS cases_au AFTER UPDATE ON cases BEGIN
+    INSERT INTO cases_fts (cases_fts, rowid, {", ".join(_TEXT_COLUMNS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{column}" for column in _TEXT_COLUMNS)});
+    INSERT INTO cases_fts (rowid, {", ".join(_TEXT_COLUMNS)})
+    VALUES (new.id, {", ".join(f"new.{column}" for column in _TEXT_COLUMNS)});
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Upsert that keeps previously stored OCR text when none is supplied
+# Private-use characters snippet() puts around matches. The snippet is
+# HTML-escaped first and they are then swapped for <mark> tags, so document
+# text can never inject markup; they are stripped from indexed text.
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+_MARKERS = str.maketrans("", "", _MATCH_START + _MATCH_END)
+
+# Cases read and indexed per transaction while building the index
+_BUILD_BATCH_SIZE = 500
+
+_UPSERT = f"""
+INSERT INTO cases (case_id, status, {", ".join(_TEXT_COLUMNS)})
+VALUES ({", ".join("?" * (len(_TEXT_COLUMNS) + 2))})
+ON CONFLICT(case_id) DO UPDATE SET
+    status = excluded.status,
+    {", ".join(f"{column} = excluded.{column}" for column in _TEXT_COLUMNS if column != "ocr_text")},
+    ocr_text = COALESCE(excluded.ocr_text, cases.ocr_text)
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is not None:
+        return _conn
+
+    conn = sqlite3.connect(str(SEARCH_DB_FILE), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    _conn = conn
+    return _conn
+
+
+def build_index() -> int:
+    """Index the existing hot and archived cases, with their stored OCR text.
+
+    Done once per index file, in the background by the maintenance worker,
+    so server startup never waits for it; cases created or updated meanwhile
+    are indexed as usual. Returns the number of cases indexed (0 if the index
+    was already built).
+    """
+    # Imported here because patient_service depends on this module.
+    from services import archive_service, patient_service
+
+    conn = _get_conn()
+    if conn.execute("SELECT value FROM meta WHERE key = 'built'").fetchone():
+        return 0
+
+    count = 0
+    batch: List[Dict] = []
+    for case in itertools.chain(patient_service.get_all_patients(), archive_service.iter_cases()):
+        batch.append(case)
+        if len(batch) >= _BUILD_BATCH_SIZE:
+            count += _index_with_texts(batch)
+            batch = []
+    count += _index_with_texts(batch)
+
+    with _lock, conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+    return count
+
+
+def _index_with_texts(cases: List[Dict]) -> int:
+    from services import patient_service
+
+    ocr_texts = {}
+    for case in cases:
+        text = patient_service.get_case_text(case.get("id"))
+        if text is not None:
+            ocr_texts[case["id"]] = text
+    index_cases(cases, ocr_texts)
+    return len(cases)
+
+
+def warm_up() -> bool:
+    """Open the index ahead of the first search; building it is left to build_index."""
+    _get_conn()
+    return True
+
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    return text.translate(_MARKERS) if text else text
+
+
+def _case_row(case: Dict, ocr_text: Optional[str]) -> tuple:
+    analysis = case.get("analysis_result") or {}
+    return (
+        case.get("id"),
+        case.get("status") or "",
+        _clean(case.get("patient_name") or ""),
+        _clean(case.get("policy_name") or ""),
+        _clean(case.get("provider_name") or ""),
+        _clean(analysis.get("summary") or ""),
+        _clean(analysis.get("reasoning") or ""),
+        _clean(" ; ".join(analysis.get("entities_detected") or [])),
+        _clean(ocr_text),
+    )
+
+
+def _snippet_html(snippet: Optional[str]) -> str:
+    """Escape a raw snippet, then mark up the matches."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+
+def index_cases(cases: Iterable[Dict], ocr_texts: Optional[Dict[str, str]] = None) -> None:
+    """Add or refresh cases in the search index.
+
+    ``ocr_texts`` maps case IDs to document text; cases without an entry keep
+    whatever text was stored for them before.
+    """
+    ocr_texts = ocr_texts or {}
+    conn = _get_conn()
+    rows = [_case_row(case, ocr_texts.get(case.get("id"))) for case in cases if case.get("id")]
+    with _lock, conn:
+        conn.executemany(_UPSERT, rows)
+
+
+def index_case(case: Dict, ocr_text: Optional[str] = None) -> None:
+    """Add or refresh a single case in the search index."""
+    index_cases([case], {case.get("id"): ocr_text} if ocr_text is not None else None)
+
+
+def _to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(query: str, limit: int = 20, offset: int = 0) -> Dict:
+    """Ranked full-text search over cases with highlighted snippets."""
+    match = _to_match_query(query)
+    if not match:
+        return {"query": query, "total": 0, "results": []}
+
+    conn = _get_conn()
+    total = conn.execute(
+        "SELECT count(*) FROM cases_fts WHERE cases_fts MATCH ?", (match,)
+    ).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT c.case_id, c.patient_name, c.policy_name, c.provider_name, c.status, "
+        f"bm25(cases_fts, {', '.join(str(w) for w in _BM25_WEIGHTS)}) AS score, "
+        f"snippet(cases_fts, -1, '{_MATCH_START}', '{_MATCH_END}', '…', 16) AS snippet "
+        f"FROM cases_fts JOIN cases c ON c.id = cases_fts.rowid "
+        f"WHERE cases_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+        (match, limit, offset),
+    ).fetchall()
+
+    results: List[Dict] = [
+        {
+            "id": row["case_id"],
+            "patient_name": row["patient_name"],
+            "policy_name": row["policy_name"],
+            "provider_name": row["provider_name"] or None,
+            "status": row["status"],
+            # bm25() is lower-is-better; flip it so higher scores rank first
+            "score": round(-row["score"], 4),
+            # HTML-safe: document text escaped, matches wrapped in <mark>
+            "snippet": _snippet_html(row["snippet"]),
+        }
+        for row in rows
+    ]
+    return {"query": query, "total": total, "results": results}
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+# Store locks serialise read-modify-write cycles on the JSON files in data/
+# across threads and worker processes. Writes are atomic, so readers never
+# need them. Nested locks are always taken in this order:
+# patients -> policies -> provider_stats -> blobs -> archive
+_thread_locks: Dict[str, threading.RLock] = {}
+_held: Dict[str, int] = {}
+_files: Dict[str, Any] = {}
+_leaders: Dict[str, Any] = {}
+_registry_lock = threading.Lock()
+
+try:
+    import fcntl
+
+    def _lock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _try_lock_file(f) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _unlock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(f) -> None:
+        f.seek(0)
+        while True:
+            try:
+                # Blocks for ~10s before raising; keep waiting
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _try_lock_file(f) -> bool:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock_file(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def lock(name: str):
+    """Hold the named store lock; re-entrant within a thread."""
+    with _registry_lock:
+        thread_lock = _thread_locks.setdefault(name, threading.RLock())
+
+    with thread_lock:
+        depth = _held.get(name, 0)
+        if depth == 0:
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
+            f = open(DATA_DIR / f".{name}.lock", "a+b")
+            try:
+                _lock_file(f)
+            except BaseException:
+                f.close()
+                raise
+            _files[name] = f
+        _held[name] = depth + 1
+        try:
+            yield
+        finally:
+            _held[name] -= 1
+            if _held[name] == 0:
+                f = _files.pop(name)
+                try:
+                    _unlock_file(f)
+                finally:
+                    f.close()
+
+
+def hold_leadership(name: str) -> bool:
+    """Try to become the one process holding ``name`` for the rest of its life.
+
+    Non-blocking; returns True if this process holds it (now or already). The
+    OS drops the lock when the process exits, so another one can take over.
+    """
+    with _registry_lock:
+        if name in _leaders:
+            return True
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        f = open(DATA_DIR / f".{name}.lock", "a+b")
+        if not _try_lock_file(f):
+            f.close()
+            return False
+        _leaders[name] = f
+        return True
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write data to a temp file in the target directory, then rename over the target."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def write_json(path: Path, data: Any, **dump_kwargs) -> None:
+    """Serialise data as JSON and replace ``path`` with it atomically."""
+    atomic_write(path, json.dumps(data, **dump_kwargs).encode("utf-8"))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import server modules the way main.py does (``from services import ...``)
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.admission_service import (
+    KIND_CASE,
+    KIND_QUICK,
+    REASON_QUEUE_FULL,
+    REASON_WAIT_TIMEOUT,
+    AdmissionController,
+    AdmissionRejected,
+)
+
+NOW = datetime.now(timezone.utc)
+
+
+def _due(hours: float) -> datetime:
+    return NOW + timedelta(hours=hours)
+
+
+async def _settle() -> None:
+    """Let every runnable task get as far as it can."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_release_hands_slot_to_most_urgent_waiter():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=10, max_wait_seconds=5)
+        order = []
+        gate = asyncio.Event()
+
+        async def run(name, deadline, kind=KIND_CASE):
+            async with controller.slot(deadline, kind):
+                order.append(name)
+                if name == "holder":
+                    await gate.wait()
+
+        holder = asyncio.create_task(run("holder", _due(1)))
+        await _settle()
+        waiters = [
+            asyncio.create_task(run("late", _due(48))),
+            asyncio.create_task(run("quick", _due(24), KIND_QUICK)),
+            asyncio.create_task(run("urgent", _due(2))),
+            asyncio.create_task(run("case", _due(24), KIND_CASE)),
+        ]
+        await _settle()
+        assert controller.queue_depth == 4
+        assert controller.metrics()["in_flight"] == 1
+
+        gate.set()
+        await asyncio.gather(holder, *waiters)
+        return controller, order
+
+    controller, order = asyncio.run(scenario())
+    # Deadline first; on a tie, cases go before quick analyses
+    assert order == ["holder", "urgent", "case", "quick", "late"]
+    assert controller.metrics()["in_flight"] == 0
+    assert controller.queue_depth == 0
+
+
+def test_full_queue_is_rejected_as_queue_full():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, max_wait_seconds=5)
+        gate = asyncio.Event()
+
+        async def hold():
+            async with controller.slot(_due(1)):
+                await gate.wait()
+
+        tasks = [asyncio.create_task(hold()), asyncio.create_task(hold())]
+        await _settle()
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot(_due(1)):
+                pass
+        gate.set()
+        await asyncio.gather(*tasks)
+        return controller, excinfo.value
+
+    controller, exc = asyncio.run(scenario())
+    assert exc.reason == REASON_QUEUE_FULL
+    assert exc.retry_after >= 1
+    assert controller.metrics()["rejected"] == 1
+    assert controller.metrics()["admitted"] == 2
+
+
+def test_wait_timeout_is_rejected_and_leaves_no_waiter():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait_seconds=0.01)
+        gate = asyncio.Event()
+
+        async def hold():
+            async with controller.slot(_due(1)):
+                await gate.wait()
+
+        holder = asyncio.create_task(hold())
+        await _settle()
+        with pytest.raises(AdmissionRejected) as excinfo:
+            async with controller.slot(_due(1)):
+                pass
+        depth = controller.queue_depth
+        gate.set()
+        await holder
+        return controller, excinfo.value, depth
+
+    controller, exc, depth = asyncio.run(scenario())
+    assert exc.reason == REASON_WAIT_TIMEOUT
+    assert depth == 0
+    assert controller.metrics()["in_flight"] == 0
+
+
+def test_cancelled_waiter_is_skipped_on_release():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait_seconds=5)
+        gate = asyncio.Event()
+        ran = []
+
+        async def run(name, deadline):
+            async with controller.slot(deadline):
+                ran.append(name)
+                if name == "holder":
+                    await gate.wait()
+
+        holder = asyncio.create_task(run("holder", _due(1)))
+        await _settle()
+        cancelled = asyncio.create_task(run("cancelled", _due(2)))
+        later = asyncio.create_task(run("later", _due(3)))
+        await _settle()
+
+        cancelled.cancel()
+        await _settle()
+        assert controller.queue_depth == 1
+
+        gate.set()
+        await asyncio.gather(holder, later)
+        return controller, ran, cancelled
+
+    controller, ran, cancelled = asyncio.run(scenario())
+    assert cancelled.cancelled()
+    assert ran == ["holder", "later"]
+    assert controller.metrics()["in_flight"] == 0
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_not_lost():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=5, max_wait_seconds=5)
+        ran = []
+
+        async def run(name, deadline):
+            async with controller.slot(deadline):
+                ran.append(name)
+
+        async with controller.slot(_due(1)):
+            granted = asyncio.create_task(run("granted", _due(2)))
+            later = asyncio.create_task(run("later", _due(3)))
+            await _settle()
+        # The slot was just handed to "granted"; cancel it before it gets to run
+        granted.cancel()
+        await later
+        await _settle()
+        return controller, ran, granted
+
+    controller, ran, granted = asyncio.run(scenario())
+    # Depending on the Python version, wait_for either raises the cancellation
+    # (the slot is passed on) or returns the grant it already had (the slot is
+    # used); either way it must come back
+    assert ran == (["later"] if granted.cancelled() else ["granted", "later"])
+    assert controller.metrics()["in_flight"] == 0
+    assert controller.queue_depth == 0